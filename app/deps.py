@@ -1,8 +1,8 @@
 # app/deps.py
 from __future__ import annotations
 from datetime import datetime, timezone
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
@@ -53,3 +53,20 @@ def get_current_active_user(
 ) -> models.User:
     # add extra checks here if you later add 'is_active' etc.
     return current_user
+
+def get_current_instructor(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Optional[models.Instructor]:
+    """Instructor row for the current user (None if there is none).
+
+    FastAPI already caches Depends(get_current_instructor) per request; the memo on
+    request.state only matters for direct calls (e.g. delete_all_students), which would
+    otherwise repeat the query.
+    """
+    if hasattr(request.state, "instructor"):
+        return request.state.instructor
+    instructor = db.query(models.Instructor).filter(models.Instructor.user_id == current_user.id).first()
+    request.state.instructor = instructor
+    return instructor
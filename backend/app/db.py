@@ -1,6 +1,9 @@
 # app/db.py
 from __future__ import annotations
-from sqlalchemy import create_engine
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
 from pathlib import Path
 
@@ -20,13 +23,47 @@ if not DATABASE_URL:
     DATABASE_URL = f"sqlite:///{DB_PATH.as_posix()}"
     # ...existing code...
 
+log = logging.getLogger(__name__)
+
+# Connection pool sizing: routers issue many short queries per request, so keep enough
+# warm connections that a request only pays for a pool checkout, not a new handshake.
+POOL_SIZE = getattr(settings, "DB_POOL_SIZE", 20)
+MAX_OVERFLOW = getattr(settings, "DB_MAX_OVERFLOW", 10)
+POOL_RECYCLE = getattr(settings, "DB_POOL_RECYCLE", 3600)
+# Rows per multi-row INSERT ... VALUES statement when executemany() goes through insertmanyvalues
+INSERTMANYVALUES_PAGE_SIZE = getattr(settings, "DB_INSERTMANYVALUES_PAGE_SIZE", 1000)
+
+_url = make_url(DATABASE_URL)
+# In-memory sqlite gets a SingletonThreadPool, which rejects the QueuePool sizing arguments
+_MEMORY_SQLITE = _url.get_backend_name() == "sqlite" and (
+    _url.database in (None, "", ":memory:") or _url.query.get("mode") == "memory"
+)
+_pool_args = {} if _MEMORY_SQLITE else {
+    "pool_size": POOL_SIZE,
+    "max_overflow": MAX_OVERFLOW,
+    "pool_recycle": POOL_RECYCLE,
+}
+
 # sqlite needs check_same_thread=False for FastAPI
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    pool_pre_ping=True,
+    insertmanyvalues_page_size=INSERTMANYVALUES_PAGE_SIZE,
     future=True,
+    **_pool_args,
 )
 
+def _warn_on_pool_saturation(dbapi_connection, connection_record, connection_proxy):
+    checked_out = engine.pool.checkedout()
+    if checked_out >= POOL_SIZE + MAX_OVERFLOW:
+        log.warning("DB pool saturated: %s connections checked out (pool_size=%s, max_overflow=%s)",
+                    checked_out, POOL_SIZE, MAX_OVERFLOW)
+
+# Only a QueuePool has a size to saturate (and a checkedout() count to read)
+if isinstance(engine.pool, QueuePool):
+    event.listen(engine, "checkout", _warn_on_pool_saturation)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 Base = declarative_base()
 
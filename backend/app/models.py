@@ -1,7 +1,7 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Integer, Float, Text, DateTime, String, func, ForeignKey
+from sqlalchemy import Integer, Float, Text, DateTime, String, func, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db import Base
 
@@ -70,6 +70,11 @@ class CourseEnrollment(Base):
     course: Mapped["Course"] = relationship("Course", back_populates="enrollments")
     student: Mapped["Student"] = relationship("Student", back_populates="enrollments")
 
+    # Enrollments are almost always looked up by student (+ course and/or status)
+    __table_args__ = (
+        Index("ix_enrollment_student_course_status", "student_id", "course_id", "status"),
+    )
+
 class Assignment(Base):
     __tablename__ = "Assignment"
     assignment_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -170,6 +175,13 @@ class Submission(Base):
     # New relationship: additional files attached to the submission
     files: Mapped[List["SubmissionFile"]] = relationship("SubmissionFile", back_populates="submission", cascade="all, delete-orphan")
 
+    # The review list filters on status / student / assignment and orders by submitted_at
+    __table_args__ = (
+        Index("ix_sub_status_submitted", "status", "submitted_at"),
+        Index("ix_sub_student_submitted", "student_id", "submitted_at"),
+        Index("ix_sub_assignment_submitted", "assignment_id", "submitted_at"),
+    )
+
 class SubmissionFeedback(Base):
     __tablename__ = "SubmissionFeedback"
     feedback_id:   Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
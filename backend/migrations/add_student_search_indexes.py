@@ -0,0 +1,47 @@
+"""
+Add indexes backing the student search in /student-management/students.
+Run:
+  python -m migrations.add_student_search_indexes
+
+On PostgreSQL this enables pg_trgm and creates GIN trigram indexes on
+Student.full_name / Student.student_number / Student.email, which let the
+planner serve the existing ORed ILIKE '%term%' filters from a bitmap index
+scan instead of a sequential scan. (The UNIQUE btree on student_number only
+helps exact and prefix lookups.)
+
+SQLite cannot index infix LIKE patterns, so nothing is created there.
+"""
+from __future__ import annotations
+from sqlalchemy import text
+
+from app.db import engine
+
+PG_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS ix_student_full_name_trgm ON "Student" USING gin (full_name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_student_number_trgm ON "Student" USING gin (student_number gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_student_email_trgm ON "Student" USING gin (email gin_trgm_ops)',
+]
+
+
+def upgrade(engine) -> None:
+    if engine.dialect.name != "postgresql":
+        print(f"Skipping trigram indexes: not supported on {engine.dialect.name}")
+        return
+    with engine.begin() as conn:
+        for stmt in PG_STATEMENTS:
+            conn.execute(text(stmt))
+    print("✓ Ensured trigram search indexes on Student")
+
+
+def downgrade(engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_student_email_trgm"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_student_number_trgm"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_student_full_name_trgm"))
+
+
+if __name__ == "__main__":
+    upgrade(engine)
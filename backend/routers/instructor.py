@@ -9,10 +9,11 @@ from fastapi.responses import StreamingResponse
 import io
 import zipfile
 from pydantic import BaseModel, Field, confloat
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import and_, case, func, text
 import json
+import heapq
 import pandas as pd
 import io
 from typing import Literal
@@ -1526,6 +1527,19 @@ class ScheduleItemUpdate(BaseModel):
     description: Optional[str] = None
     status: Optional[Literal["scheduled", "completed", "cancelled"]] = None
 
+# Payload key -> InstructorSchedule attribute, used by update_schedule_item
+SCHEDULE_FIELD_MAP = {
+    "title": "title",
+    "type": "type",
+    "date": "date",
+    "startTime": "start_time",
+    "endTime": "end_time",
+    "location": "location",
+    "description": "description",
+    "status": "status",
+}
+SCHEDULE_NULLABLE_FIELDS = {"description"}  # may be explicitly cleared with null
+
 def _serialize_schedule_item(it: models.InstructorSchedule) -> ScheduleItemRead:
     return ScheduleItemRead(
         id=it.id,
@@ -1539,6 +1553,17 @@ def _serialize_schedule_item(it: models.InstructorSchedule) -> ScheduleItemRead:
         status=it.status,
     )
 
+def _student_name_map(db: Session, ids) -> Dict[int, Optional[str]]:
+    """Fetch {student_id: full_name} for the given ids in a single IN query."""
+    ids = list(ids)
+    if not ids:
+        return {}
+    return dict(
+        db.query(models.Student.student_id, models.Student.full_name)
+        .filter(models.Student.student_id.in_(ids))
+        .all()
+    )
+
 @router.get("/analytics")
 def get_instructor_analytics(
     period: str = Query("month", description="Time period: week, month, quarter, year"),
@@ -1714,7 +1739,7 @@ def get_instructor_analytics(
                 .filter(models.SubmissionFeedback.grade.isnot(None))
                 .scalar()
             )
-        except Exception:
+        except SQLAlchemyError:
             avg_percent = None
         average_grade = float(avg_percent) if avg_percent is not None else 0.0
     else:
@@ -1724,86 +1749,81 @@ def get_instructor_analytics(
     # keep average at 0 to avoid leaking other instructors' data.
     print(f"DEBUG: Using instructor-scoped average grade: {average_grade}")
     
-    # Submission trends over time (course-specific if filtering)
-    from sqlalchemy import func, text
+    # Submission trends over time (course-specific if filtering), bucketed per day in SQL
     submission_trends = []
     days_range = 7 if period == "week" else 30 if period == "month" else 90 if period == "quarter" else 365
-    
+    window_start = (now - timedelta(days=days_range - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    day_submissions: Dict[str, int] = {}
+    day_reviews: Dict[str, int] = {}
     if assignment_ids:
-        for i in range(days_range):
-            date = now - timedelta(days=days_range - 1 - i)
-            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            # Course-specific submissions for this day
-            day_submissions = (
-                db.query(models.Submission)
+        sub_day = func.date(models.Submission.submitted_at)
+        day_submissions = {
+            str(d): n
+            for d, n in (
+                db.query(sub_day, func.count(models.Submission.submission_id))
                 .filter(models.Submission.assignment_id.in_(assignment_ids))
-                .filter(models.Submission.submitted_at >= day_start)
-                .filter(models.Submission.submitted_at <= day_end)
-                .count()
+                .filter(models.Submission.submitted_at >= window_start)
+                .group_by(sub_day)
+                .all()
             )
-            
-            # Course-specific reviews for this day
-            day_reviews = (
-                db.query(models.SubmissionFeedback)
+        }
+        review_day = func.date(models.SubmissionFeedback.created_at)
+        day_reviews = {
+            str(d): n
+            for d, n in (
+                db.query(review_day, func.count(models.SubmissionFeedback.feedback_id))
                 .join(models.Submission, models.Submission.submission_id == models.SubmissionFeedback.submission_id)
                 .filter(models.Submission.assignment_id.in_(assignment_ids))
-                .filter(models.SubmissionFeedback.created_at >= day_start)
-                .filter(models.SubmissionFeedback.created_at <= day_end)
-                .count()
+                .filter(models.SubmissionFeedback.created_at >= window_start)
+                .group_by(review_day)
+                .all()
             )
-            
-            submission_trends.append({
-                "date": date.strftime("%b %d"),
-                "submissions": day_submissions,
-                "reviews": day_reviews
-            })
-    else:
-        # Generate empty data for the period
-        for i in range(days_range):
-            date = now - timedelta(days=days_range - 1 - i)
-            submission_trends.append({
-                "date": date.strftime("%b %d"),
-                "submissions": 0,
-                "reviews": 0
-            })
+        }
+
+    # Fill in zero buckets for days without activity
+    for i in range(days_range):
+        date = now - timedelta(days=days_range - 1 - i)
+        key = date.strftime("%Y-%m-%d")
+        submission_trends.append({
+            "date": date.strftime("%b %d"),
+            "submissions": day_submissions.get(key, 0),
+            "reviews": day_reviews.get(key, 0),
+        })
     
-    # Grade distribution (normalized to percentage)
+    # Grade distribution (normalized to percentage), bucketed in SQL
     grade_distribution = []
-    percents: list[float] = []
     if assignment_ids:
         try:
             denom = func.nullif(func.coalesce(models.Assignment.max_grade, 100.0), 0)
-            rows = (
-                db.query((models.SubmissionFeedback.grade * 100.0) / denom)
+            pct = (models.SubmissionFeedback.grade * 100.0) / denom
+            graded, excellent, good, average, below, avg_pct = (
+                db.query(
+                    func.count(pct),
+                    func.sum(case((pct >= 90, 1), else_=0)),
+                    func.sum(case((and_(pct >= 70, pct < 90), 1), else_=0)),
+                    func.sum(case((and_(pct >= 60, pct < 70), 1), else_=0)),
+                    func.sum(case((pct < 60, 1), else_=0)),
+                    func.avg(pct),
+                )
                 .join(models.Submission, models.Submission.submission_id == models.SubmissionFeedback.submission_id)
                 .join(models.Assignment, models.Assignment.assignment_id == models.Submission.assignment_id)
                 .filter(models.Submission.assignment_id.in_(assignment_ids))
                 .filter(models.SubmissionFeedback.grade.isnot(None))
-                .all()
+                .one()
             )
-            percents = [float(r[0]) for r in rows if r[0] is not None]
-        except Exception:
-            percents = []
-
-    if percents:
-        excellent = len([p for p in percents if p >= 90])
-        good = len([p for p in percents if 70 <= p < 90])
-        average = len([p for p in percents if 60 <= p < 70])
-        below = len([p for p in percents if p < 60])
-
-        grade_distribution = [
-            {"name": "Excellent (>=90%)", "value": excellent, "color": "#10b981"},
-            {"name": "Good (70–89%)", "value": good, "color": "#0ea5e9"},
-            {"name": "Average (60–69%)", "value": average, "color": "#eab308"},
-            {"name": "Below (<60%)", "value": below, "color": "#ef4444"},
-        ]
-        # Also set the overall average grade (percent) from the same normalized list
-        try:
-            average_grade = float(sum(percents) / len(percents))
-        except Exception:
-            pass
+        except SQLAlchemyError:
+            graded = 0
+
+        if graded:
+            grade_distribution = [
+                {"name": "Excellent (>=90%)", "value": excellent, "color": "#10b981"},
+                {"name": "Good (70–89%)", "value": good, "color": "#0ea5e9"},
+                {"name": "Average (60–69%)", "value": average, "color": "#eab308"},
+                {"name": "Below (<60%)", "value": below, "color": "#ef4444"},
+            ]
+            # Also set the overall average grade (percent) from the same normalized rows
+            average_grade = avg_pct
     
     # Course performance
     course_performance = []
@@ -1829,8 +1849,8 @@ def get_instructor_analytics(
                     .filter(models.SubmissionFeedback.grade.isnot(None))
                     .scalar()
                 )
-                course_avg_grade = float(course_avg_grade_val) if course_avg_grade_val is not None else 0.0
-            except Exception:
+                course_avg_grade = course_avg_grade_val if course_avg_grade_val is not None else 0.0
+            except SQLAlchemyError:
                 course_avg_grade = 0.0
             
             # Calculate completion rate - robust approach with multiple safeguards
@@ -1922,26 +1942,25 @@ def get_instructor_analytics(
     # Fallback: if none found, try grades given by the current instructor regardless of assignment linkage
     # BUT ONLY if we're not filtering by a specific course (to avoid showing wrong students)
     if not graded_rows and course_id is None:
-        try:
-            print("DEBUG: Falling back to grades by current instructor (SubmissionFeedback.instructor_id)")
-            fallback_query = (
-                db.query(
-                    models.Submission.student_id,
-                    models.Submission.submission_id,
-                    models.SubmissionFeedback.grade,
-                    models.Assignment.max_grade,
-                    models.Student.full_name,
-                )
-                .join(models.SubmissionFeedback, models.SubmissionFeedback.submission_id == models.Submission.submission_id)
-                .join(models.Assignment, models.Assignment.assignment_id == models.Submission.assignment_id)
-                .outerjoin(models.Student, models.Student.student_id == models.Submission.student_id)
-                .filter(models.SubmissionFeedback.instructor_id == current_user.id)
-                .filter(models.SubmissionFeedback.grade.isnot(None))
+        print("DEBUG: Falling back to grades by current instructor (SubmissionFeedback.instructor_id)")
+        fallback_query = (
+            db.query(
+                models.Submission.student_id,
+                models.Submission.submission_id,
+                models.SubmissionFeedback.grade,
+                models.Assignment.max_grade,
+                models.Student.full_name,
             )
-            
+            .join(models.SubmissionFeedback, models.SubmissionFeedback.submission_id == models.Submission.submission_id)
+            .join(models.Assignment, models.Assignment.assignment_id == models.Submission.assignment_id)
+            .outerjoin(models.Student, models.Student.student_id == models.Submission.student_id)
+            .filter(models.SubmissionFeedback.instructor_id == current_user.id)
+            .filter(models.SubmissionFeedback.grade.isnot(None))
+        )
+        try:
             graded_rows = fallback_query.all()
             print(f"DEBUG: Fallback found {len(graded_rows)} graded rows by instructor")
-        except Exception as e:
+        except SQLAlchemyError as e:
             print(f"DEBUG: Fallback by instructor failed: {e}")
     elif not graded_rows and course_id is not None:
         print(f"DEBUG: No graded submissions found for course {course_id} - this is expected if no assignments have been graded yet")
@@ -1969,38 +1988,24 @@ def get_instructor_analytics(
             if sid not in student_grades:
                 student_grades[sid] = {"percents": [], "submissions": 0}
             if grade is not None:
-                try:
-                    mg = float(max_g) if max_g is not None else 100.0
-                    if mg > 0:
-                        pct = (float(grade) * 100.0) / mg
-                        student_grades[sid]["percents"].append(pct)
-                except Exception:
-                    pass
+                mg = max_g if max_g is not None else 100.0
+                if mg > 0:
+                    student_grades[sid]["percents"].append((grade * 100.0) / mg)
             student_grades[sid]["submissions"] += 1
             print(f"DEBUG: Student {sid} ({full_name}) submission {sub_id}: grade {grade}")
 
+        # Resolve names for all graded students in one query
+        try:
+            names = _student_name_map(db, (sid for sid, data in student_grades.items() if data["percents"]))
+        except SQLAlchemyError as e:
+            print(f"DEBUG: Error getting student names: {e}")
+            names = {}
+
         # Calculate averages and build top list from graded data
         for sid, data in student_grades.items():
             if data["percents"]:
-                avg = sum(data["percents"]) / len(data["percents"]) if data["percents"] else 0
-                # Get student name with better error handling
-                try:
-                    student = db.query(models.Student).filter(models.Student.student_id == sid).first()
-                    if student and student.full_name:
-                        name = student.full_name
-                    else:
-                        # Try to get name from enrollment record
-                        enrollment = db.query(models.CourseEnrollment).filter(
-                            models.CourseEnrollment.student_id == sid
-                        ).first()
-                        if enrollment and hasattr(enrollment, 'student_name'):
-                            name = enrollment.student_name
-                        else:
-                            name = f"Student ID {sid}"
-                except Exception as e:
-                    print(f"DEBUG: Error getting name for student {sid}: {e}")
-                    name = f"Student ID {sid}"
-                
+                avg = sum(data["percents"]) / len(data["percents"])
+                name = names.get(sid) or f"Student ID {sid}"
                 top_students.append({
                     "name": name,
                     "grade": round(avg, 1),  # already a percent
@@ -2009,7 +2014,7 @@ def get_instructor_analytics(
                 print(f"DEBUG: Added top performer: {name} (ID: {sid}) - Grade: {avg:.1f}, Submissions: {data['submissions']}")
         
         # Keep best 5 by grade and add validation
-        top_students = sorted(top_students, key=lambda x: x["grade"], reverse=True)[:5]
+        top_students = heapq.nlargest(5, top_students, key=lambda x: x["grade"])
         
         # Final validation: ensure we don't exceed enrolled students count
         if course_id is not None and len(top_students) > len(enrolled_student_ids):
@@ -2019,75 +2024,76 @@ def get_instructor_analytics(
         
         print(f"DEBUG: Final top performers count: {len(top_students)} for course {course_id}")
 
-    # Fallback 2: If still empty, use CourseEnrollment.grade for students in instructor's courses
-    # BUT ONLY for "all courses" view, not for specific course filtering
-    if not top_students and course_ids and course_id is None:
-        try:
+    # Fallbacks only apply to the "all courses" view, and only when the graded pass above
+    # produced nothing; otherwise skip their queries entirely.
+    if not top_students and course_id is None:
+        # Fallback 2: use CourseEnrollment.grade for students in instructor's courses
+        if course_ids:
             print("DEBUG: Falling back to CourseEnrollment grades for instructor's courses")
-            enrollment_grades = (
-                db.query(models.CourseEnrollment.student_id, models.CourseEnrollment.grade)
-                .filter(models.CourseEnrollment.course_id.in_(course_ids))
-                .filter(models.CourseEnrollment.grade.isnot(None))
-                .all()
-            )
-            # Aggregate by student_id
-            temp: Dict[int, Dict[str, Any]] = {}
-            for sid, gr in enrollment_grades:
-                if sid not in temp:
-                    temp[sid] = {"grades": [], "submissions": 0}
-                temp[sid]["grades"].append(float(gr))
-                # Treat each course grade as one submission-equivalent for ranking display
-                temp[sid]["submissions"] += 1
-            # Build top_students from enrollment grades
-            for sid, data in temp.items():
-                student = db.query(models.Student).filter(models.Student.student_id == sid).first()
-                if student and data["grades"]:
-                    avg_grade = sum(data["grades"]) / len(data["grades"])
-                    top_students.append({
-                        "name": student.full_name,
-                        "grade": round(avg_grade, 1),
-                        "submissions": data["submissions"],
-                    })
-            # Sort and keep top 5
-            top_students = sorted(top_students, key=lambda x: x["grade"], reverse=True)[:5]
+            try:
+                enrollment_grades = (
+                    db.query(models.CourseEnrollment.student_id, models.CourseEnrollment.grade)
+                    .filter(models.CourseEnrollment.course_id.in_(course_ids))
+                    .filter(models.CourseEnrollment.grade.isnot(None))
+                    .all()
+                )
+            except SQLAlchemyError as e:
+                print(f"DEBUG: Enrollment grades fallback failed: {e}")
+                enrollment_grades = []
+            if enrollment_grades:
+                # Aggregate by student_id
+                temp: Dict[int, Dict[str, Any]] = {}
+                for sid, gr in enrollment_grades:
+                    if sid not in temp:
+                        temp[sid] = {"grades": [], "submissions": 0}
+                    temp[sid]["grades"].append(gr)
+                    # Treat each course grade as one submission-equivalent for ranking display
+                    temp[sid]["submissions"] += 1
+                # Build top_students from enrollment grades
+                names = _student_name_map(db, temp.keys())
+                for sid, data in temp.items():
+                    if sid in names and data["grades"]:
+                        avg_grade = sum(data["grades"]) / len(data["grades"])
+                        top_students.append({
+                            "name": names[sid],
+                            "grade": round(avg_grade, 1),
+                            "submissions": data["submissions"],
+                        })
+                # Sort and keep top 5
+                top_students = heapq.nlargest(5, top_students, key=lambda x: x["grade"])
             print(f"DEBUG: Enrollment fallback produced {len(top_students)} top students")
-        except Exception as e:
-            print(f"DEBUG: Enrollment grades fallback failed: {e}")
-        
-        # Note: primary graded Top Performers already computed above; enrollment fallback builds a separate list when needed
 
-    # Fallback: If still no top students (no grades yet), build from submissions only (ungraded)
-    # BUT ONLY for "all courses" view, not for specific course filtering
-    if not top_students and assignment_ids and course_id is None:
-        try:
+        # Fallback 3: If still no top students (no grades yet), build from submissions only (ungraded)
+        if not top_students and assignment_ids:
             print("DEBUG: Building Top Performers from ungraded submissions (fallback)")
-            submit_counts = (
-                db.query(
-                    models.Submission.student_id,
-                    models.Student.full_name,
-                    func.count(models.Submission.submission_id),
+            try:
+                submit_counts = (
+                    db.query(
+                        models.Submission.student_id,
+                        models.Student.full_name,
+                        func.count(models.Submission.submission_id),
+                    )
+                    .outerjoin(models.Student, models.Student.student_id == models.Submission.student_id)
+                    .filter(models.Submission.assignment_id.in_(assignment_ids))
+                    .filter(models.Submission.submitted_at >= start_date)
+                    .group_by(models.Submission.student_id, models.Student.full_name)
+                    .all()
                 )
-                .outerjoin(models.Student, models.Student.student_id == models.Submission.student_id)
-                .filter(models.Submission.assignment_id.in_(assignment_ids))
-                .filter(models.Submission.submitted_at >= start_date)
-                .group_by(models.Submission.student_id, models.Student.full_name)
-                .all()
-            )
-            temp = []
-            for sid, full_name, cnt in submit_counts:
-                name = full_name or f"Student ID {sid}"
-                temp.append({
-                    "name": name,
+            except SQLAlchemyError as e:
+                print(f"DEBUG: Ungraded Top Performers fallback failed: {e}")
+                submit_counts = []
+            ungraded = [
+                {
+                    "name": full_name or f"Student ID {sid}",
                     "grade": None,  # no grade yet
-                    "submissions": int(cnt),
-                })
+                    "submissions": cnt,
+                }
+                for sid, full_name, cnt in submit_counts
+            ]
             # Rank by submissions desc and take top 5
-            temp = sorted(temp, key=lambda x: x["submissions"], reverse=True)[:5]
-            if temp:
-                print(f"DEBUG: Ungraded Top Performers fallback produced {len(temp)} students")
-            top_students = temp
-        except Exception as e:
-            print(f"DEBUG: Ungraded Top Performers fallback failed: {e}")
+            top_students = heapq.nlargest(5, ungraded, key=lambda x: x["submissions"])
+            if top_students:
+                print(f"DEBUG: Ungraded Top Performers fallback produced {len(top_students)} students")
     elif not top_students and course_id is not None:
         print(f"DEBUG: No top performers found for course {course_id} - this is expected if no graded submissions exist")
 
@@ -2095,42 +2101,39 @@ def get_instructor_analytics(
     
     # Final fallback for overview average: if still zero/None but we have top_students with grades,
     # derive average from top_students percent grades to avoid showing 0 when data exists.
-    try:
-        if (average_grade is None or float(average_grade) == 0.0) and top_students:
-            ts_grades = [float(t.get("grade", 0)) for t in top_students if t.get("grade") is not None]
-            if ts_grades:
-                average_grade = sum(ts_grades) / len(ts_grades)
-    except Exception:
-        pass
+    if (average_grade is None or average_grade == 0.0) and top_students:
+        ts_grades = [t["grade"] for t in top_students if t.get("grade") is not None]
+        if ts_grades:
+            average_grade = sum(ts_grades) / len(ts_grades)
 
     # Final validation and data consistency checks
-    try:
-        # Validate completion rates in course performance
-        for course_perf in course_performance:
-            if course_perf.get("completion", 0) > 100:
-                print(f"WARNING: Course {course_perf.get('course', 'Unknown')} has completion rate > 100%: {course_perf.get('completion')}")
-                course_perf["completion"] = 100
-        
-        # Validate top students count for course-specific requests
-        if course_id is not None:
+    # Validate completion rates in course performance
+    for course_perf in course_performance:
+        if course_perf.get("completion", 0) > 100:
+            print(f"WARNING: Course {course_perf.get('course', 'Unknown')} has completion rate > 100%: {course_perf.get('completion')}")
+            course_perf["completion"] = 100
+
+    # Validate top students count for course-specific requests
+    if course_id is not None:
+        try:
             enrolled_count = (
                 db.query(models.CourseEnrollment)
                 .filter(models.CourseEnrollment.course_id == course_id)
                 .filter(models.CourseEnrollment.status == "Active")
                 .count()
             )
-            if len(top_students) > enrolled_count:
-                print(f"WARNING: Top students count ({len(top_students)}) exceeds enrolled students ({enrolled_count}) for course {course_id}")
-                top_students = top_students[:enrolled_count]
-        
-        # Final debug summary
-        print(f"DEBUG: Analytics summary -> totalStudents={total_students}, activeAssignments={len(assignments)}, totalSubmissions={total_submissions}, avgGrade={round(average_grade,1)}, topStudents={len(top_students)}")
-        print(f"DEBUG: Course performance data: {len(course_performance)} courses")
-        for cp in course_performance:
-            print(f"DEBUG: Course '{cp.get('course')}' - Completion: {cp.get('completion')}%, Submissions: {cp.get('submissions')}")
-            
-    except Exception as e:
-        print(f"ERROR: Final validation failed: {e}")
+        except SQLAlchemyError as e:
+            print(f"ERROR: Final validation failed: {e}")
+            enrolled_count = len(top_students)
+        if len(top_students) > enrolled_count:
+            print(f"WARNING: Top students count ({len(top_students)}) exceeds enrolled students ({enrolled_count}) for course {course_id}")
+            top_students = top_students[:enrolled_count]
+
+    # Final debug summary
+    print(f"DEBUG: Analytics summary -> totalStudents={total_students}, activeAssignments={len(assignments)}, totalSubmissions={total_submissions}, avgGrade={round(average_grade,1)}, topStudents={len(top_students)}")
+    print(f"DEBUG: Course performance data: {len(course_performance)} courses")
+    for cp in course_performance:
+        print(f"DEBUG: Course '{cp.get('course')}' - Completion: {cp.get('completion')}%, Submissions: {cp.get('submissions')}")
 
     return {
         "overview": {
@@ -2157,7 +2160,13 @@ def list_schedule(
     if not inst:
         inst = _get_or_create_instructor_for_user(db, current_user)
 
-    q = db.query(models.InstructorSchedule).filter(models.InstructorSchedule.instructor_id == inst.instructor_id)
+    # The serializer only reads columns; raiseload makes any future relationship access
+    # fail loudly instead of issuing one lazy SELECT per row.
+    q = (
+        db.query(models.InstructorSchedule)
+        .options(raiseload("*"))
+        .filter(models.InstructorSchedule.instructor_id == inst.instructor_id)
+    )
     if date:
         try:
             # parse yyyy-mm-dd and compute day range
@@ -2209,38 +2218,35 @@ def update_schedule_item(
 ):
     _require_instructor(current_user)
     inst = _get_or_create_instructor_for_user(db, current_user)
-    it = db.query(models.InstructorSchedule).filter(
+    q = db.query(models.InstructorSchedule).filter(
         models.InstructorSchedule.id == item_id,
         models.InstructorSchedule.instructor_id == inst.instructor_id,
-    ).first()
-    if not it:
-        raise HTTPException(status_code=404, detail="Schedule item not found")
+    )
 
     data = payload.model_dump(exclude_unset=True)
-    if "title" in data:
-        it.title = data["title"]
-    if "type" in data and data["type"]:
-        it.type = data["type"]
-    if "date" in data and data["date"]:
-        it.date = data["date"]
-    if "startTime" in data and data["startTime"] is not None:
-        it.start_time = data["startTime"]
-    if "endTime" in data and data["endTime"] is not None:
-        it.end_time = data["endTime"]
-    if "location" in data and data["location"] is not None:
-        it.location = data["location"]
-    if "description" in data:
-        it.description = data["description"]
-    if "status" in data and data["status"]:
-        it.status = data["status"]
-    _touch_updated(it)
+    values: Dict[str, Any] = {}
+    for key, attr in SCHEDULE_FIELD_MAP.items():
+        if key not in data:
+            continue
+        value = data[key]
+        if value is None and key not in SCHEDULE_NULLABLE_FIELDS:
+            continue
+        values[attr] = value
+    values["updated_at"] = _now()
+
+    # Ownership check and mutation happen in one UPDATE statement
     try:
+        updated = q.update(values, synchronize_session=False)
+        if not updated:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Schedule item not found")
         db.commit()
-        db.refresh(it)
+    except HTTPException:
+        raise
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update schedule item")
-    return _serialize_schedule_item(it)
+    return _serialize_schedule_item(q.options(raiseload("*")).one())
 
 @router.delete("/schedule/{item_id}")
 def delete_schedule_item(
@@ -2250,15 +2256,17 @@ def delete_schedule_item(
 ):
     _require_instructor(current_user)
     inst = _get_or_create_instructor_for_user(db, current_user)
-    it = db.query(models.InstructorSchedule).filter(
-        models.InstructorSchedule.id == item_id,
-        models.InstructorSchedule.instructor_id == inst.instructor_id,
-    ).first()
-    if not it:
-        raise HTTPException(status_code=404, detail="Schedule item not found")
     try:
-        db.delete(it)
+        deleted = db.query(models.InstructorSchedule).filter(
+            models.InstructorSchedule.id == item_id,
+            models.InstructorSchedule.instructor_id == inst.instructor_id,
+        ).delete(synchronize_session=False)
+        if not deleted:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Schedule item not found")
         db.commit()
+    except HTTPException:
+        raise
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete schedule item")
@@ -2363,27 +2371,25 @@ def list_quiz_entries(
     if not instr:
         raise HTTPException(status_code=403, detail="Instructor profile not found")
 
-    q = db.query(models.QuizEntry).filter(models.QuizEntry.instructor_id == instr.instructor_id)
+    # Select plain columns (no ORM hydration); response_model validates the output once
+    q = db.query(
+        models.QuizEntry.id,
+        models.QuizEntry.student_id,
+        models.QuizEntry.course_id,
+        models.QuizEntry.title,
+        models.QuizEntry.quiz_date,
+        models.QuizEntry.max_grade,
+        models.QuizEntry.grade,
+        models.QuizEntry.notes,
+        models.QuizEntry.created_at,
+    ).filter(models.QuizEntry.instructor_id == instr.instructor_id)
     if student_id is not None:
         q = q.filter(models.QuizEntry.student_id == student_id)
     if course_id is not None:
         q = q.filter(models.QuizEntry.course_id == course_id)
 
     rows = q.order_by(models.QuizEntry.created_at.desc()).all()
-    return [
-        QuizEntryRead(
-            id=r.id,
-            student_id=r.student_id,
-            course_id=r.course_id,
-            title=r.title,
-            quiz_date=r.quiz_date,
-            max_grade=r.max_grade,
-            grade=r.grade,
-            notes=r.notes,
-            created_at=r.created_at,
-        )
-        for r in rows
-    ]
+    return [QuizEntryRead.model_construct(**r._mapping) for r in rows]
 
 
 @router.delete("/quiz-entries/{entry_id}", summary="Delete a quiz entry")
@@ -2397,15 +2403,17 @@ def delete_quiz_entry(
     if not instr:
         raise HTTPException(status_code=403, detail="Instructor profile not found")
 
-    ent = db.query(models.QuizEntry).filter(
-        models.QuizEntry.id == entry_id,
-        models.QuizEntry.instructor_id == instr.instructor_id,
-    ).first()
-    if not ent:
-        raise HTTPException(status_code=404, detail="Quiz entry not found")
     try:
-        db.delete(ent)
+        deleted = db.query(models.QuizEntry).filter(
+            models.QuizEntry.id == entry_id,
+            models.QuizEntry.instructor_id == instr.instructor_id,
+        ).delete(synchronize_session=False)
+        if not deleted:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Quiz entry not found")
         db.commit()
+    except HTTPException:
+        raise
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete quiz entry")
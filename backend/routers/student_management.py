@@ -1,35 +1,59 @@
 # routers/student_management.py
 from __future__ import annotations
 
-from typing import Optional, List
+from typing import Iterable, Iterator, Optional, List, Tuple
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased, joinedload
 from sqlalchemy.exc import IntegrityError
 import io
+import os
+import json
+import shutil
+import tempfile
+import re
 import csv
-import pandas as pd
+import itertools
+import codecs
+import logging
+import time
 from fastapi import UploadFile, File, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 try:
-    import openpyxl  # for Excel fallback parsing
+    import openpyxl  # for streaming .xlsx parsing
 except Exception:
     openpyxl = None
+try:
+    import charset_normalizer  # for encoding detection of CSV/TXT uploads
+except Exception:
+    charset_normalizer = None
 
-# Import Excel workaround
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from excel_workaround import process_excel_with_workaround
-
-from app.db import get_db
+from app.db import SessionLocal, get_db
 from app import models
-from app.deps import get_current_active_user
+from app.deps import get_current_active_user, get_current_instructor
 from core.security import get_password_hash
+from core.config import settings
 
 router = APIRouter(prefix="/student-management", tags=["student-management"])
+logger = logging.getLogger(__name__)
+
+# ---- Constants ---------------------------------------------------------------
+
+VALID_YEAR_LEVELS = frozenset({"First", "Second", "Third", "Fourth", "Fifth"})
+VALID_STUDENT_STATUSES = frozenset({"Active", "Inactive", "Graduated", "Suspended"})
+# Lower-cased column names that mark the first row of an import file as a header row
+IMPORT_HEADER_NAMES = frozenset({
+    'full_name', 'student_number', 'email', 'phone', 'year_level', 'status',
+    'graduation_year', 'notes', 'name', 'number', 'student',
+})
 
 # ---- Pydantic models --------------------------------------------------------
 
@@ -81,15 +105,286 @@ def _require_instructor(user: models.User):
     if (user.role or "").lower() not in {"instructor", "admin"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Instructor or admin role required")
 
+def _instructor_user(current_user: models.User = Depends(get_current_active_user)) -> models.User:
+    """Current user, after the instructor/admin role check."""
+    _require_instructor(current_user)
+    return current_user
+
+def _current_instructor(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(_instructor_user),
+) -> Optional[models.Instructor]:
+    """Instructor row for the current user; depends on the role check so other roles get
+    their 403 before any Instructor query runs."""
+    return get_current_instructor(request, db, current_user)
+
+# Max number of bound parameters per IN (...) list; keeps SQLite/PG parameter limits happy
+IN_CLAUSE_CHUNK_SIZE = 1000
+# Search terms that look like a student number (upper-case letters/digits/dashes, at least one digit)
+STUDENT_NUMBER_SEARCH_RE = re.compile(r"^(?=.*\d)[0-9A-Z-]+$")
+# course_id cells of an import may hold several ids separated by commas/semicolons ("1,2; 3")
+COURSE_ID_SPLIT_RE = re.compile(r"[,;]")
+COURSE_ID_RE = re.compile(r"^\d+$")
+# Accepted import rows written (and committed) per batch
+BULK_IMPORT_BATCH_SIZE = int(getattr(settings, "BULK_IMPORT_BATCH_SIZE", 10000))
+# Processes used to bcrypt the passwords of a bulk import in parallel
+PASSWORD_HASH_WORKERS = os.cpu_count() or 1
+# Bytes read from the head of a text upload to detect its encoding
+ENCODING_SNIFF_BYTES = 32768
+
+def _chunks(items: List, size: int = IN_CLAUSE_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _batched(iterable, size: int):
+    """Yield lists of up to ``size`` items from ``iterable`` without materializing it."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _existing_values(db: Session, column, values) -> set:
+    """Subset of ``values`` already present in ``column``, resolved with chunked IN queries."""
+    found = set()
+    for chunk in _chunks(list(values)):
+        found.update(v for (v,) in db.query(column).filter(column.in_(chunk)).all())
+    return found
+
+def _upsert_insert(db: Session, model):
+    """INSERT construct (for a model or Table) on the bound dialect, supporting ON CONFLICT (PostgreSQL or SQLite)."""
+    if db.get_bind().dialect.name == "postgresql":
+        return pg_insert(model)
+    return sqlite_insert(model)
+
+def _bulk_insert_import_rows(db: Session, user_rows: List[dict], student_rows: List[dict], course_ids_by_number: dict) -> None:
+    """Insert the users, students and enrollments collected by bulk import.
+
+    Each table gets one Core executemany INSERT (batched into multi-row VALUES by the engine's
+    insertmanyvalues support) with RETURNING for the generated ids, so no re-SELECT is needed.
+    """
+    if user_rows:
+        # ON CONFLICT DO NOTHING: a row that collides with an existing user is skipped, not an error
+        users = models.User.__table__
+        new_user_ids = dict(db.execute(
+            _upsert_insert(db, users).on_conflict_do_nothing().returning(users.c.username, users.c.id),
+            user_rows,
+        ).all())
+        for row in student_rows:
+            if row["user_id"] is None:
+                row["user_id"] = new_user_ids.get(row["student_number"])
+
+    if student_rows:
+        students = models.Student.__table__
+        student_ids = dict(db.execute(
+            _upsert_insert(db, students)
+            .on_conflict_do_nothing(index_elements=["student_number"])
+            .returning(students.c.student_number, students.c.student_id),
+            student_rows,
+        ).all())
+
+        enrolled_at = datetime.utcnow()
+        enrollment_rows = [
+            {
+                "course_id": cid,
+                "student_id": student_ids[number],
+                "status": "Active",
+                "enrolled_at": enrolled_at,
+            }
+            for number, cids in course_ids_by_number.items()
+            if number in student_ids  # skipped on conflict -> not ours to enroll
+            for cid in cids
+        ]
+        if enrollment_rows:
+            db.execute(insert(models.CourseEnrollment.__table__), enrollment_rows)
+
+def _resolve_import_lookups(db: Session, records: List[dict]) -> Tuple[set, set, set, dict]:
+    """Resolve existing student numbers, user emails, course ids and username -> user id for a batch
+    of records (keyed by lower-cased header names).
+
+    One IN query per chunk instead of per-row lookups, so the import loop only does set/dict checks.
+    """
+    candidate_numbers = set()
+    candidate_emails = set()
+    candidate_course_ids = set()
+    for record in records:
+        number = (record.get('student_number') or '').strip()
+        if number:
+            candidate_numbers.add(number)
+        email = (record.get('email') or '').strip()
+        if email:
+            candidate_emails.add(email)
+            if number:
+                # Fallback placeholder used when the supplied email is taken
+                candidate_emails.add(f"{number}@temp.com")
+        raw_ids = record.get('course_id') or ''
+        if raw_ids:
+            candidate_course_ids.update(
+                int(p) for p in (t.strip() for t in COURSE_ID_SPLIT_RE.split(raw_ids)) if COURSE_ID_RE.match(p)
+            )
+    user_ids_by_username = {}
+    for chunk in _chunks(list(candidate_numbers)):
+        user_ids_by_username.update(
+            db.query(models.User.username, models.User.id)
+            .filter(models.User.username.in_(chunk))
+            .all()
+        )
+    return (
+        _existing_values(db, models.Student.student_number, candidate_numbers),
+        _existing_values(db, models.User.email, candidate_emails),
+        _existing_values(db, models.Course.course_id, candidate_course_ids),
+        user_ids_by_username,
+    )
+
+def _commit_import_batch(db: Session, user_rows: List[dict], student_rows: List[dict], course_ids_by_number: dict) -> None:
+    """Insert and commit one batch of accepted import rows, then clear the buffers for the next batch."""
+    if not student_rows:
+        return
+    _bulk_insert_import_rows(db, user_rows, student_rows, course_ids_by_number)
+    db.commit()
+    user_rows.clear()
+    student_rows.clear()
+    course_ids_by_number.clear()
+
+@lru_cache(maxsize=1)
+def _default_password_hash() -> str:
+    """bcrypt hash of the default "password", computed once per process instead of per student."""
+    return get_password_hash("password")
+
+# Worker processes for bcrypt (CPU-bound, holds the GIL); owned by the app's startup/shutdown
+_password_hash_pool: Optional[ProcessPoolExecutor] = None
+
+@router.on_event("startup")
+def _start_password_hash_pool() -> None:
+    """Create the hash pool at startup, spawning workers rather than forking the threaded server."""
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        _password_hash_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+@router.on_event("shutdown")
+def _shutdown_password_hash_pool() -> None:
+    global _password_hash_pool
+    if _password_hash_pool is not None:
+        _password_hash_pool.shutdown()
+        _password_hash_pool = None
+
+def _fill_password_hashes(user_rows: List[dict], passwords: List[str]) -> None:
+    """Set password_hash on each pending user row, hashing every row with its own salt.
+
+    Hashes are never shared between accounts, even for identical passwords; a batch of more
+    than one row is spread over the process pool so bcrypt runs on all cores (serially if the
+    pool was not started, e.g. outside the app).
+    """
+    pool = _password_hash_pool
+    if pool is not None and len(passwords) > 1:
+        chunksize = max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4))
+        hashes = pool.map(get_password_hash, passwords, chunksize=chunksize)
+    else:
+        hashes = [get_password_hash(p) for p in passwords]
+    for row, password_hash in zip(user_rows, hashes):
+        row["password_hash"] = password_hash
+
+def _detect_encoding(fileobj) -> str:
+    """Pick the encoding of an uploaded text file from its first 32KB, then rewind.
+
+    UTF-8 (with or without BOM) is tried first; otherwise the encoding is detected
+    with charset_normalizer when available. latin-1 is the last resort since it can
+    decode any byte sequence.
+    """
+    fileobj.seek(0)
+    head = fileobj.read(ENCODING_SNIFF_BYTES)
+    fileobj.seek(0)
+    try:
+        # final=False so a multi-byte character cut at the 32KB boundary is not an error
+        codecs.getincrementaldecoder("utf-8-sig")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        pass
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(head).best()
+        if best is not None:
+            return best.encoding
+    return "latin-1"
+
+def _open_text_upload(fileobj) -> io.TextIOWrapper:
+    """Wrap an upload's spooled file for streaming text reads in its detected encoding."""
+    return io.TextIOWrapper(fileobj, encoding=_detect_encoding(fileobj), newline='')
+
+def _upload_size(fileobj) -> int:
+    fileobj.seek(0, io.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+def _cell_to_str(value) -> str:
+    """Normalize a spreadsheet cell to the plain string form the importer expects."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Numeric student numbers / years come back as floats from Excel
+        return str(int(value))
+    return str(value)
+
+def _read_excel_records(fileobj, file_ext: str) -> List[dict]:
+    """Read the first worksheet of an uploaded file object into a list of {header: value} dicts.
+
+    Header names are stripped and lower-cased, matching the CSV/TXT readers.
+
+    .xlsx is parsed with openpyxl in read-only mode (streaming rows, bounded memory).
+    Legacy .xls is not supported by openpyxl and goes through pandas.
+    """
+    fileobj.seek(0)
+    if file_ext == 'xls':
+        import pandas as pd  # only needed for legacy .xls
+        df = pd.read_excel(fileobj, dtype=str, keep_default_na=False)
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        return df.to_dict('records')
+
+    if openpyxl is None:
+        raise HTTPException(status_code=500, detail="openpyxl is required to read .xlsx files")
+
+    wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = None
+        records = []
+        for row in rows:
+            if not any(v is not None and str(v).strip() for v in row):
+                continue  # skip blank rows
+            if headers is None:
+                headers = [_cell_to_str(v).strip().lower() for v in row]
+                continue
+            records.append({h: _cell_to_str(v) for h, v in zip(headers, row) if h})
+        return records
+    finally:
+        wb.close()
+
+def _txt_record(line: str, headers: List[str]) -> dict:
+    """Map one tab- or comma-separated line of a .txt import onto ``headers``."""
+    parts = line.split('\t') if '\t' in line else line.split(',')
+    return {header: parts[i].strip() if i < len(parts) else '' for i, header in enumerate(headers)}
+
+def _primary_course(student: models.Student) -> Tuple[Optional[str], Optional[int]]:
+    """(title, course_id) of the student's first active enrollment; expects enrollments eager-loaded."""
+    active = [e for e in student.enrollments if e.status == "Active"]
+    if active:
+        course = min(active, key=lambda e: e.enrollment_id).course
+        if course:
+            return course.title, course.course_id
+    return None, None
+
 def _validate_year_level(year_level: str):
-    valid_levels = {"First", "Second", "Third", "Fourth", "Fifth"}
-    if year_level not in valid_levels:
-        raise HTTPException(status_code=400, detail=f"Invalid year level. Must be one of: {', '.join(valid_levels)}")
+    if year_level not in VALID_YEAR_LEVELS:
+        raise HTTPException(status_code=400, detail=f"Invalid year level. Must be one of: {', '.join(VALID_YEAR_LEVELS)}")
 
 def _validate_status(status: str):
-    valid_statuses = {"Active", "Inactive", "Graduated", "Suspended"}
-    if status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
+    if status not in VALID_STUDENT_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STUDENT_STATUSES)}")
 
 # ---- Routes ----------------------------------------------------------------
 
@@ -110,112 +405,119 @@ def create_student(
     _validate_year_level(student_data.year_level)
     _validate_status(student_data.status)
     
-    # Check if student number already exists
-    existing_student = db.query(models.Student).filter(
-        models.Student.student_number == student_data.student_number
-    ).first()
-    
-    if existing_student:
-        # Idempotent behavior: if student exists, try to auto-link to a User with same username, then return existing
-        try:
-            if getattr(existing_student, "user_id", None) in (None, 0):
-                user = db.query(models.User).filter(models.User.username == existing_student.student_number).first()
-                if user:
-                    existing_student.user_id = user.id
-                    db.commit()
-                    db.refresh(existing_student)
-        except Exception:
-            db.rollback()
-        return StudentResponse(
-            student_id=existing_student.student_id,
-            student_number=existing_student.student_number,
-            full_name=existing_student.full_name,
-            email=existing_student.email,
-            phone=existing_student.phone,
-            year_level=existing_student.year_level,
-            status=existing_student.status,
-            graduation_year=existing_student.graduation_year,
-            notes=existing_student.notes,
-            created_at=existing_student.created_at
-        )
-    
-    # Create new student
+    now = datetime.utcnow()
     try:
-        # If a User already exists with username == student_number, link it on create
-        linked_user_id = None
-        try:
-            candidate_user = db.query(models.User).filter(models.User.username == student_data.student_number).first()
-            if candidate_user:
-                linked_user_id = candidate_user.id
-        except Exception:
-            linked_user_id = None
-
-        if not linked_user_id:
-            # Create a new user if one doesn't exist for this student_number
-            # Generate a default password if not provided
-            default_password = student_data.password or "password"
-            hashed_password = get_password_hash(default_password)
-
-            new_user = models.User(
-                username=student_data.student_number,
-                email=student_data.email or f"{student_data.student_number}@example.com", # Use a dummy email if none provided
+        # INSERT ... ON CONFLICT DO NOTHING RETURNING: creates the student or tells us it already
+        # exists in one statement, with no window between the check and the insert
+        new_student = db.execute(
+            _upsert_insert(db, models.Student)
+            .values(
+                student_number=student_data.student_number,
                 full_name=student_data.full_name,
-                password_hash=hashed_password,
-                role="student",
-                created_at=datetime.utcnow(),
+                email=student_data.email,
+                phone=student_data.phone,
+                year_level=student_data.year_level,
+                status=student_data.status,
+                graduation_year=student_data.graduation_year,
+                notes=student_data.notes,
+                created_at=now,
             )
-            db.add(new_user)
-            db.flush()  # To get the new_user.id
-            linked_user_id = new_user.id
-
-        new_student = models.Student(
-            student_number=student_data.student_number,
-            full_name=student_data.full_name,
-            email=student_data.email,
-            phone=student_data.phone,
-            year_level=student_data.year_level,
-            status=student_data.status,
-            graduation_year=student_data.graduation_year,
-            notes=student_data.notes,
-            created_at=datetime.utcnow(),
-            user_id=linked_user_id
-        )
-        
-        db.add(new_student)
-        db.commit()
-        db.refresh(new_student)
-        
-        # Enroll student in the specified courses
-        enrollments = []
-        for course_id in student_data.course_ids:
-            # Check if course exists
-            course = db.query(models.Course).filter(models.Course.course_id == course_id).first()
-            if not course:
-                db.rollback()
-                raise HTTPException(status_code=400, detail=f"Course with ID {course_id} not found")
-            
-            # Check if already enrolled
-            existing_enrollment = db.query(models.CourseEnrollment).filter(
-                models.CourseEnrollment.course_id == course_id,
-                models.CourseEnrollment.student_id == new_student.student_id,
-                models.CourseEnrollment.status == "Active"
-            ).first()
-            
-            if not existing_enrollment:
-                enrollment = models.CourseEnrollment(
-                    course_id=course_id,
-                    student_id=new_student.student_id,
-                    status="Active",  # Default status for new enrollments
-                    enrolled_at=datetime.utcnow()
+            .on_conflict_do_nothing(index_elements=["student_number"])
+            .returning(models.Student)
+        ).scalar_one_or_none()
+
+        if new_student is None:
+            # Idempotent behavior: the student exists; auto-link it to a User with the same
+            # username (if not linked yet) and return the existing record
+            db.execute(
+                update(models.Student)
+                .where(
+                    models.Student.student_number == student_data.student_number,
+                    or_(models.Student.user_id.is_(None), models.Student.user_id == 0),
                 )
-                db.add(enrollment)
-                enrollments.append(enrollment)
+                .values(user_id=(
+                    select(models.User.id)
+                    .where(models.User.username == student_data.student_number)
+                    .scalar_subquery()
+                ))
+            )
+            existing_student = db.query(models.Student).filter(
+                models.Student.student_number == student_data.student_number
+            ).one()
+            response = StudentResponse(
+                student_id=existing_student.student_id,
+                student_number=existing_student.student_number,
+                full_name=existing_student.full_name,
+                email=existing_student.email,
+                phone=existing_student.phone,
+                year_level=existing_student.year_level,
+                status=existing_student.status,
+                graduation_year=existing_student.graduation_year,
+                notes=existing_student.notes,
+                created_at=existing_student.created_at
+            )
+            db.commit()
+            return response
+
+        # Validate all requested courses with a single query before enrolling
+        course_ids = list(dict.fromkeys(student_data.course_ids))  # de-duplicate, keep order
+        valid_course_ids = set()
+        for chunk in _chunks(course_ids):
+            valid_course_ids.update(
+                cid for (cid,) in db.query(models.Course.course_id)
+                .filter(models.Course.course_id.in_(chunk))
+                .all()
+            )
+        missing_course_ids = [cid for cid in course_ids if cid not in valid_course_ids]
+        if missing_course_ids:
+            raise HTTPException(status_code=400, detail=f"Course with ID {missing_course_ids[0]} not found")
+
+        # Link the User with username == student_number, creating it if it doesn't exist yet.
+        # Look it up first so bcrypt only runs when a user row is actually inserted
+        linked_user_id = db.query(models.User.id).filter(
+            models.User.username == student_data.student_number
+        ).scalar()
+        if linked_user_id is None:
+            # Fall back to the (cached) hash of the default password if none was provided
+            hashed_password = (
+                get_password_hash(student_data.password) if student_data.password
+                else _default_password_hash()
+            )
+            linked_user_id = db.execute(
+                _upsert_insert(db, models.User)
+                .values(
+                    username=student_data.student_number,
+                    email=student_data.email or f"{student_data.student_number}@example.com", # Use a dummy email if none provided
+                    full_name=student_data.full_name,
+                    password_hash=hashed_password,
+                    role="student",
+                    created_at=now,
+                )
+                .on_conflict_do_nothing(index_elements=["username"])
+                .returning(models.User.id)
+            ).scalar_one_or_none()
+        if linked_user_id is None:
+            # Lost a race with a concurrent insert of the same username
+            linked_user_id = db.query(models.User.id).filter(
+                models.User.username == student_data.student_number
+            ).scalar()
+        new_student.user_id = linked_user_id
         
-        db.commit()
-        for enrollment in enrollments:
-            db.refresh(enrollment)
+        # Enroll student in the specified courses (already validated and de-duplicated above;
+        # a freshly created student has no existing enrollments to check against)
+        enrollments = [
+            models.CourseEnrollment(
+                course_id=course_id,
+                student_id=new_student.student_id,
+                status="Active",  # Default status for new enrollments
+                enrolled_at=now
+            )
+            for course_id in course_ids
+        ]
+        db.add_all(enrollments)
 
-        return StudentResponse(
+        # Build the response before commit expires the instance, so no reload SELECT is needed
+        response = StudentResponse(
             student_id=new_student.student_id,
             student_number=new_student.student_number,
             full_name=new_student.full_name,
@@ -227,7 +529,12 @@ def create_student(
             notes=new_student.notes,
             created_at=new_student.created_at
         )
+        db.commit()
+        return response
         
+    except HTTPException:
+        db.rollback()
+        raise
     except IntegrityError as e:
         db.rollback()
         raise HTTPException(status_code=400, detail="Failed to create student. Please check your input.")
@@ -247,20 +554,31 @@ def list_students(
     limit: int = 50,
     offset: int = 0,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
+    instructor: Optional[models.Instructor] = Depends(_current_instructor),
 ):
-    _require_instructor(current_user)
-
-    # Resolve current instructor
-    instructor = db.query(models.Instructor).filter(models.Instructor.user_id == current_user.id).first()
     if not instructor:
         return []
 
+    # The student's primary (first active) enrollment, resolved in the same statement
+    primary_course_id = (
+        select(models.CourseEnrollment.course_id)
+        .where(
+            models.CourseEnrollment.student_id == models.Student.student_id,
+            models.CourseEnrollment.status == "Active",
+        )
+        .order_by(models.CourseEnrollment.enrollment_id)
+        .limit(1)
+        .correlate(models.Student)
+        .scalar_subquery()
+    )
+    PrimaryCourse = aliased(models.Course)
+
     # Students enrolled in instructor-owned courses
     query = (
-        db.query(models.Student)
+        db.query(models.Student, PrimaryCourse.title, PrimaryCourse.course_id)
         .join(models.CourseEnrollment, models.CourseEnrollment.student_id == models.Student.student_id)
         .join(models.Course, models.Course.course_id == models.CourseEnrollment.course_id)
+        .outerjoin(PrimaryCourse, PrimaryCourse.course_id == primary_course_id)
         .filter(models.Course.created_by == instructor.instructor_id)
     )
 
@@ -273,7 +591,17 @@ def list_students(
         _validate_status(status)
         query = query.filter(models.Student.status == status)
     
-    if search:
+    search = (search or "").strip()
+    if search and STUDENT_NUMBER_SEARCH_RE.match(search):
+        # Instructor typed a student number: prefix match as a range on the UNIQUE student_number
+        # index (a plain btree can serve this on SQLite and PostgreSQL, unlike LIKE 'x%')
+        upper_bound = search[:-1] + chr(ord(search[-1]) + 1)
+        query = query.filter(
+            models.Student.student_number >= search,
+            models.Student.student_number < upper_bound,
+        )
+    elif search:
+        # Served by the pg_trgm GIN indexes (migrations/add_student_search_indexes.py) on PostgreSQL
         search_term = f"%{search}%"
         query = query.filter(
             models.Student.full_name.ilike(search_term) |
@@ -282,7 +610,7 @@ def list_students(
         )
 
     # DISTINCT to avoid duplicates across multiple enrollments
-    students = (
+    rows = (
         query.distinct(models.Student.student_id)
         .order_by(models.Student.created_at.desc())
         .offset(offset)
@@ -292,23 +620,7 @@ def list_students(
     
     # Build response with course information
     result = []
-    for student in students:
-        # Get the student's primary course enrollment
-        enrollment = db.query(models.CourseEnrollment).filter(
-            models.CourseEnrollment.student_id == student.student_id,
-            models.CourseEnrollment.status == "Active"
-        ).first()
-        
-        course_name = None
-        course_id = None
-        if enrollment:
-            course = db.query(models.Course).filter(
-                models.Course.course_id == enrollment.course_id
-            ).first()
-            if course:
-                course_name = course.title
-                course_id = course.course_id
-        
+    for student, course_name, course_id in rows:
         result.append(StudentResponse(
             student_id=student.student_id,
             student_number=student.student_number,
@@ -338,26 +650,18 @@ def get_student(
 ):
     _require_instructor(current_user)
     
-    student = db.query(models.Student).filter(models.Student.student_id == student_id).first()
+    student = (
+        db.query(models.Student)
+        .options(joinedload(models.Student.enrollments).joinedload(models.CourseEnrollment.course))
+        .filter(models.Student.student_id == student_id)
+        .first()
+    )
     
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
     # Get the student's primary course enrollment
-    enrollment = db.query(models.CourseEnrollment).filter(
-        models.CourseEnrollment.student_id == student.student_id,
-        models.CourseEnrollment.status == "Active"
-    ).first()
-    
-    course_name = None
-    course_id = None
-    if enrollment:
-        course = db.query(models.Course).filter(
-            models.Course.course_id == enrollment.course_id
-        ).first()
-        if course:
-            course_name = course.title
-            course_id = course.course_id
+    course_name, course_id = _primary_course(student)
     
     return StudentResponse(
         student_id=student.student_id,
@@ -387,11 +691,20 @@ def update_student(
 ):
     _require_instructor(current_user)
     
-    student = db.query(models.Student).filter(models.Student.student_id == student_id).first()
+    student = (
+        db.query(models.Student)
+        .options(joinedload(models.Student.enrollments).joinedload(models.CourseEnrollment.course))
+        .filter(models.Student.student_id == student_id)
+        .first()
+    )
     
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
+    # Get the student's primary course enrollment (unaffected by the update; read before
+    # commit expires the eager-loaded relationships)
+    course_name, course_id = _primary_course(student)
+    
     # Update only provided fields
     update_data = student_data.dict(exclude_unset=True)
     
@@ -406,22 +719,6 @@ def update_student(
         db.commit()
         db.refresh(student)
         
-        # Get the student's primary course enrollment
-        enrollment = db.query(models.CourseEnrollment).filter(
-            models.CourseEnrollment.student_id == student.student_id,
-            models.CourseEnrollment.status == "Active"
-        ).first()
-        
-        course_name = None
-        course_id = None
-        if enrollment:
-            course = db.query(models.Course).filter(
-                models.Course.course_id == enrollment.course_id
-            ).first()
-            if course:
-                course_name = course.title
-                course_id = course.course_id
-        
         return StudentResponse(
             student_id=student.student_id,
             student_number=student.student_number,
@@ -481,6 +778,7 @@ def delete_student(
     summary="Delete all students visible to the instructor. Admin may delete all.",
 )
 def delete_all_students(
+    request: Request,
     scope: str = "mine",  # "mine" (default, only students under instructor courses) or "all" (admin only)
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
@@ -490,86 +788,61 @@ def delete_all_students(
     - scope=mine (default): deletes students enrolled in courses created by the current instructor.
     - scope=all (admin only): deletes all students in the system.
 
-    Deletes related course enrollments and submissions first, then students.
+    Related course enrollments and submissions are deleted in the same transaction.
     """
     role = (current_user.role or "").lower()
     if scope == "all":
         if role != "admin":
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin role required for scope=all")
-        student_ids_q = db.query(models.Student.student_id)
+        # Student is deleted last, so the subquery can be re-evaluated by every DELETE
+        id_batches = [select(models.Student.student_id)]
     else:
         # instructor-only scope: delete students from instructor-owned courses
         if role not in {"instructor", "doctor", "admin"}:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Instructor or admin role required")
-        instructor = db.query(models.Instructor).filter(models.Instructor.user_id == current_user.id).first()
+        instructor = get_current_instructor(request, db, current_user)
         if not instructor:
             return {"deleted_students": 0, "deleted_enrollments": 0, "deleted_submissions": 0}
-        student_ids_q = (
-            db.query(models.Student.student_id)
-            .join(models.CourseEnrollment, models.CourseEnrollment.student_id == models.Student.student_id)
+        # Select the ids once: they are read from the enrollments that get deleted first
+        ids = [
+            sid for (sid,) in db.query(models.CourseEnrollment.student_id)
             .join(models.Course, models.Course.course_id == models.CourseEnrollment.course_id)
             .filter(models.Course.created_by == instructor.instructor_id)
             .distinct()
-        )
-
-    try:
-        ids = [row[0] for row in student_ids_q.all()]
+            .all()
+        ]
         if not ids:
             return {"deleted_students": 0, "deleted_enrollments": 0, "deleted_submissions": 0}
+        id_batches = list(_chunks(ids))
 
-        # Cascade delete in dependency order
-        deleted_enrollments = (
-            db.query(models.CourseEnrollment)
-            .filter(models.CourseEnrollment.student_id.in_(ids))
-            .delete(synchronize_session=False)
-        )
-        deleted_submissions = (
-            db.query(models.Submission)
-            .filter(models.Submission.student_id.in_(ids))
-            .delete(synchronize_session=False)
-        )
-        deleted_students = (
-            db.query(models.Student)
-            .filter(models.Student.student_id.in_(ids))
-            .delete(synchronize_session=False)
-        )
+    # FK order: enrollments reference students
+    targets = (
+        ("enrollments", models.CourseEnrollment, models.CourseEnrollment.student_id),
+        ("submissions", models.Submission, models.Submission.student_id),
+        ("students", models.Student, models.Student.student_id),
+    )
+    try:
+        deleted = {}
+        for key, model, column in targets:
+            deleted[key] = sum(
+                db.query(model)
+                .filter(column.in_(batch))
+                .delete(synchronize_session=False)
+                for batch in id_batches
+            )
 
         db.commit()
         return {
-            "deleted_students": deleted_students,
-            "deleted_enrollments": deleted_enrollments,
-            "deleted_submissions": deleted_submissions,
+            "deleted_students": deleted["students"],
+            "deleted_enrollments": deleted["enrollments"],
+            "deleted_submissions": deleted["submissions"],
         }
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to bulk delete students")
 
-@router.post(
-    "/students/bulk-import",
-    response_model=BulkImportResponse,
-    summary="Bulk import students from file (Excel, CSV, or TXT)"
-)
-async def bulk_import_students(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
-):
-    """Bulk import students from Excel (.xlsx, .xls), CSV (.csv), or text (.txt) file.
-    
-    - full_name (required)
-    - student_number (required)
-    - email(Optional)
-    - phone(Optional)
-    - year_level (Optional)
-    - status (Optional)
-    - graduation_year (Optional)
-    - notes (Optional)
-    
-    The first row should contain column headers matching the field names above.
-    """
-    _require_instructor(current_user)
-    
-    # Validate file type
+def _validate_import_file(file: UploadFile) -> str:
+    """Return the lower-cased extension of an import upload, rejecting unsupported files."""
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file provided")
         
@@ -579,212 +852,177 @@ async def bulk_import_students(
             status_code=400, 
             detail="Unsupported file type. Please upload an Excel (.xlsx, .xls), CSV (.csv), or text (.txt) file"
         )
-    
+    return file_ext
+
+def _open_import_records(fileobj, file_ext: str) -> Iterable[dict]:
+    """Open an uploaded import file as records keyed by lower-cased header names.
+
+    Header detection and encoding sniffing happen here (raising HTTPException 400 on unreadable
+    input); CSV/TXT rows are then produced lazily, Excel sheets come back as a list.
+    """
+    if file_ext in ['xlsx', 'xls']:
+        try:
+            # Parse straight from the upload file instead of copying it into memory
+            if not _upload_size(fileobj):
+                raise HTTPException(status_code=400, detail="Empty Excel file")
+
+            records = _read_excel_records(fileobj, file_ext)
+            
+            # Validate that we got records
+            if not records:
+                raise HTTPException(status_code=400, detail="No data found in Excel file")
+            
+            logger.debug("Excel import: parsed %d records", len(records))
+            
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error reading Excel file: {str(e)}")
+            
+    elif file_ext == 'csv':
+        try:
+            # Stream the spooled upload through a decoder; encoding is sniffed from the head
+            text_stream = _open_text_upload(fileobj)
+            
+            # Check if first row contains headers or actual data; the stream is parsed in a
+            # single pass, so the DictReaders below continue right after this row
+            first_row = next(csv.reader(text_stream), [])
+            column_names = [str(col).lower().strip() for col in first_row]
+            has_valid_headers = not IMPORT_HEADER_NAMES.isdisjoint(column_names)
+            
+            logger.debug("CSV import: columns=%s has_valid_headers=%s", column_names, has_valid_headers)
+            
+            if has_valid_headers:
+                # Normalize header names once here rather than per row in the import loop
+                reader = csv.DictReader(text_stream, fieldnames=column_names, restval='', restkey='_extra')
+                first_records = []
+            else:
+                # First row is data, not headers - assign proper column names based on position
+                logger.debug("CSV import: first row is data, reading without a header row")
+                expected_columns = ['full_name', 'student_number', 'email', 'phone', 'year_level', 'status', 'graduation_year', 'notes']
+                fieldnames = expected_columns[:len(first_row)]
+                reader = csv.DictReader(text_stream, fieldnames=fieldnames, restval='', restkey='_extra')
+                first_records = [dict(zip(fieldnames, first_row))]
+            
+            # Rows come back lazily as plain dicts of strings and are consumed batch by batch
+            records = itertools.chain(first_records, reader)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error reading CSV file: {str(e)}")
+            
+    else:  # txt file
+        try:
+            # Stream the spooled upload line by line; encoding is sniffed from the head
+            text_stream = _open_text_upload(fileobj)
+            lines = (line.strip() for line in text_stream if line.strip() and not line.startswith('#'))
+            first_line = next(lines, None)
+            
+            if first_line is None:
+                raise HTTPException(status_code=400, detail="File is empty")
+                
+            # Check if first line is header
+            first_line_parts = first_line.split('\t') if '\t' in first_line else first_line.split(',')
+            headers = [h.strip().lower() for h in first_line_parts if h.strip()]
+            
+            # More flexible header detection - check if any common header names are present
+            is_header_line = not IMPORT_HEADER_NAMES.isdisjoint(headers)
+            
+            logger.debug("TXT import: detected headers=%s is_header_line=%s", headers, is_header_line)
+            
+            if not is_header_line:
+                # If not a header line, assume it's data and use positional mapping
+                headers = ['full_name', 'student_number']  # Default headers for positional mapping
+                lines = itertools.chain([first_line], lines)
+                logger.debug("TXT import: no headers detected, using positional mapping")
+            
+            # Records are built lazily and consumed batch by batch
+            records = (_txt_record(line, headers) for line in lines)
+                
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Error reading text file: {str(e)}")
+
+    return records
+
+def _run_bulk_import(db: Session, records: Iterable[dict]) -> Iterator[BulkImportResponse]:
+    """Validate and insert import records batch by batch, committing each batch.
+
+    Yields the running totals after every committed batch, so callers can either report
+    progress or simply keep the last value.
+    """
     imported = 0
     skipped = 0
     errors = []
     total_processed = 0
-    
-    # Clear any existing transaction state
-    try:
-        db.rollback()
-    except:
-        pass
-    
-    try:
-        # Read file content based on file type
-        if file_ext in ['xlsx', 'xls']:
-            try:
-                # Read uploaded content once and reuse for multiple attempts
-                excel_bytes = await file.read()
-                if not excel_bytes:
-                    raise HTTPException(status_code=400, detail="Empty Excel file")
 
-                # Use workaround function to handle Excel processing
-                records = process_excel_with_workaround(excel_bytes, file_ext)
-                
-                # Validate that we got records
-                if not records:
-                    raise HTTPException(status_code=400, detail="No data found in Excel file")
-                
-                print(f"DEBUG Excel: Successfully processed {len(records)} records")
-                
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error reading Excel file: {str(e)}")
-                
-        elif file_ext == 'csv':
-            try:
-                # Read CSV file with encoding detection
-                content = await file.read()
-                
-                # Try multiple encodings
-                encodings_to_try = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
-                df = None
-                
-                for encoding in encodings_to_try:
-                    try:
-                        # Reset file position for each attempt
-                        content_str = content.decode(encoding)
-                        df = pd.read_csv(io.StringIO(content_str), dtype=str, keep_default_na=False)
-                        break
-                    except (UnicodeDecodeError, UnicodeError):
-                        continue
-                    except Exception as e:
-                        # If it's not an encoding error, try next encoding
-                        if 'codec' not in str(e).lower() and 'decode' not in str(e).lower():
-                            raise e
-                        continue
-                
-                if df is None:
-                    raise HTTPException(status_code=400, detail="Could not decode CSV file. Please save your CSV file with UTF-8 encoding or try a different format.")
-                
-                # Check if first row contains headers or actual data
-                column_names = [str(col).lower().strip() for col in df.columns]
-                common_headers = ['full_name', 'student_number', 'email', 'phone', 'year_level', 'status', 'graduation_year', 'notes', 'name', 'number', 'student']
-                has_valid_headers = any(header in common_headers for header in column_names)
-                
-                print(f"DEBUG CSV: Column names: {column_names}")
-                print(f"DEBUG CSV: Has valid headers: {has_valid_headers}")
-                
-                if not has_valid_headers:
-                    # First row is data, not headers - re-read without header row
-                    print("DEBUG CSV: First row appears to be data, not headers. Re-reading without header row.")
-                    # Find the encoding that worked
-                    working_encoding = 'utf-8'
-                    for encoding in encodings_to_try:
-                        try:
-                            content_str = content.decode(encoding)
-                            working_encoding = encoding
-                            break
-                        except (UnicodeDecodeError, UnicodeError):
-                            continue
-                    
-                    df = pd.read_csv(io.StringIO(content_str), dtype=str, keep_default_na=False, header=None)
-                    # Assign proper column names based on position
-                    expected_columns = ['full_name', 'student_number', 'email', 'phone', 'year_level', 'status', 'graduation_year', 'notes']
-                    df.columns = expected_columns[:len(df.columns)]
-                
-                # Convert to list of dictionaries
-                records = df.to_dict('records')
-                print(f"DEBUG CSV: Excel/CSV processing - found {len(records)} records")
-                if records:
-                    print(f"DEBUG CSV: First record keys: {list(records[0].keys())}")
-                    print(f"DEBUG CSV: First record values: {list(records[0].values())}")
-            except HTTPException:
-                raise
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error reading CSV file: {str(e)}")
-                
-        else:  # txt file
-            try:
-                # Read text file with encoding detection
-                raw_content = await file.read()
-                
-                # Try multiple encodings
-                encodings_to_try = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
-                content = None
-                
-                for encoding in encodings_to_try:
-                    try:
-                        content = raw_content.decode(encoding)
-                        break
-                    except (UnicodeDecodeError, UnicodeError):
-                        continue
-                
-                if content is None:
-                    raise HTTPException(status_code=400, detail="Could not decode text file. Please save your file with UTF-8 encoding.")
-                
-                lines = [line.strip() for line in content.split('\n') if line.strip() and not line.startswith('#')]
-                
-                if not lines:
-                    raise HTTPException(status_code=400, detail="File is empty")
-                    
-                # Check if first line is header
-                first_line_parts = lines[0].split('\t') if '\t' in lines[0] else lines[0].split(',')
-                headers = [h.strip().lower() for h in first_line_parts if h.strip()]
-                
-                # More flexible header detection - check if any common header names are present
-                common_headers = ['full_name', 'student_number', 'email', 'phone', 'year_level', 'status', 'graduation_year', 'notes', 'name', 'number', 'student']
-                is_header_line = any(h in common_headers for h in headers)
-                
-                print(f"DEBUG CSV: First line parts: {first_line_parts}")
-                print(f"DEBUG CSV: Detected headers: {headers}")
-                print(f"DEBUG CSV: Is header line: {is_header_line}")
-                
-                if not is_header_line:
-                    # If not a header line, assume it's data and use positional mapping
-                    headers = ['full_name', 'student_number']  # Default headers for positional mapping
-                    print("DEBUG CSV: Using positional mapping - no headers detected")
-                else:
-                    lines = lines[1:]  # Remove header line
-                    print(f"DEBUG CSV: Skipped header line, processing {len(lines)} data rows")
-                
-                records = []
-                for line in lines:
-                    parts = line.split('\t') if '\t' in line else line.split(',')
-                    record = {}
-                    for i, header in enumerate(headers):
-                        if i < len(parts):
-                            record[header] = parts[i].strip()
-                        else:
-                            record[header] = ''
-                    records.append(record)
-                    
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error reading text file: {str(e)}")
-        
+    # Rows accepted by validation; buffered per batch and inserted by _commit_import_batch
+    user_rows: List[dict] = []
+    student_rows: List[dict] = []
+    course_ids_by_number: dict = {}
+    # One timestamp for the whole import instead of a utcnow() call per row
+    now = datetime.utcnow()
+    # Plaintext password for each entry of user_rows, hashed per batch before insert
+    user_passwords: List[str] = []
+
+    # Consume the file BULK_IMPORT_BATCH_SIZE records at a time so memory stays bounded by the
+    # batch, not the file; rows committed by earlier batches are seen by the next lookups
+    for batch in _batched(enumerate(records, 1), BULK_IMPORT_BATCH_SIZE):
+        existing_numbers, existing_emails, valid_course_ids, user_ids_by_username = (
+            _resolve_import_lookups(db, [record for _, record in batch])
+        )
+        pending_emails = set()
+
         # Process each record
-        for idx, record in enumerate(records, 1):
+        for idx, record in batch:
             total_processed += 1
-            
+        
             try:
-                # Get values from record, handling case sensitivity in column names
-                record_lower = {k.lower(): v for k, v in record.items()}
-                
-                full_name = record_lower.get('full_name', '').strip()
-                student_number = record_lower.get('student_number', '').strip()
-                email = record_lower.get('email', '').strip() or None
-                phone = record_lower.get('phone', '').strip() or None
-                year_level = record_lower.get('year_level', 'Fourth').strip() or 'Fourth'
-                status = record_lower.get('status', 'Active').strip() or 'Active'
-                
+                # Header names were lower-cased once by the readers above; every value is
+                # stripped once here instead of per field access below
+                record_lower = {
+                    k: v.strip() if isinstance(v, str) else v
+                    for k, v in record.items()
+                }
+            
+                full_name = record_lower.get('full_name', '')
+                student_number = record_lower.get('student_number', '')
+                email = record_lower.get('email') or None
+                phone = record_lower.get('phone') or None
+                year_level = record_lower.get('year_level') or 'Fourth'
+                status = record_lower.get('status') or 'Active'
+            
                 # Parse graduation year
                 graduation_year = None
-                if 'graduation_year' in record_lower and record_lower['graduation_year'].strip():
+                if record_lower.get('graduation_year'):
                     try:
-                        graduation_year = int(record_lower['graduation_year'].strip())
+                        graduation_year = int(record_lower['graduation_year'])
                     except ValueError:
                         errors.append(f"Row {idx}: Invalid graduation year '{record_lower['graduation_year']}'")
                         continue
-                        
-                notes = record_lower.get('notes', '').strip() or None
-                
+                    
+                notes = record_lower.get('notes') or None
+            
                 # Get course_id(s) from CSV: allow comma/semicolon separated list (e.g., "1,2; 3")
                 course_ids: List[int] = []
-                if 'course_id' in record_lower and record_lower['course_id'].strip():
+                if record_lower.get('course_id'):
                     raw_ids = record_lower['course_id']
                     # Split by comma or semicolon
-                    parts = [p.strip() for p in raw_ids.replace(';', ',').split(',') if p and p.strip()]
-                    invalid_tokens: List[str] = []
-                    for p in parts:
-                        try:
-                            n = int(p)
-                            if n not in course_ids:
-                                course_ids.append(n)
-                        except ValueError:
-                            invalid_tokens.append(p)
+                    parts = [p.strip() for p in COURSE_ID_SPLIT_RE.split(raw_ids) if p and p.strip()]
+                    # dict.fromkeys de-duplicates in O(k) while keeping the order ids were listed in
+                    course_ids = list(dict.fromkeys(int(p) for p in parts if COURSE_ID_RE.match(p)))
+                    invalid_tokens = [p for p in parts if not COURSE_ID_RE.match(p)]
                     if invalid_tokens:
                         errors.append(f"Row {idx}: Skipped invalid course_id values: {', '.join(invalid_tokens)}")
-                
+            
                 # Validate required fields
                 if not full_name:
                     errors.append(f"Row {idx}: Missing required field 'full_name'")
                     continue
-                    
+                
                 if not student_number:
                     errors.append(f"Row {idx}: Missing required field 'student_number'")
                     continue
-                
+            
                 # Validate year level and status
                 try:
                     _validate_year_level(year_level)
@@ -792,114 +1030,127 @@ async def bulk_import_students(
                 except HTTPException as e:
                     errors.append(f"Row {idx}: {e.detail}")
                     continue
-                
+            
                 # Check if student already exists
-                existing_student = db.query(models.Student).filter(
-                    models.Student.student_number == student_number
-                ).first()
-                
-                if existing_student:
+                if student_number in existing_numbers:
                     skipped += 1
                     continue
-                
+            
                 # Create or link to user account
-                linked_user_id = None
-                password_from_csv = record_lower.get('password', '').strip()
-                
+                password_from_csv = record_lower.get('password', '')
+            
                 # Try to find existing user first
-                try:
-                    candidate_user = db.query(models.User).filter(
-                        models.User.username == student_number
-                    ).first()
-                    if candidate_user:
-                        linked_user_id = candidate_user.id
-                except Exception:
-                    pass
-                
+                linked_user_id = user_ids_by_username.get(student_number)
+            
                 # If no existing user and password provided, create new user account
                 if not linked_user_id and password_from_csv:
                     try:
-                        from core.security import get_password_hash
-                        
-                        # Check if email already exists and generate unique email if needed
+                        # Without a supplied email the placeholder is derived from the (unique) student number,
+                        # so only a supplied email needs checking (in DB or earlier in this file)
                         user_email = email or f"{student_number}@temp.com"
-                        existing_email_user = db.query(models.User).filter(
-                            models.User.email == user_email
-                        ).first()
-                        
-                        if existing_email_user:
+                        if email is not None and (user_email in pending_emails or user_email in existing_emails):
                             # Generate unique email by appending student number
                             user_email = f"{student_number}@temp.com"
                             # If that still exists, add a timestamp
-                            if db.query(models.User).filter(models.User.email == user_email).first():
-                                import time
+                            if user_email in pending_emails or user_email in existing_emails:
                                 user_email = f"{student_number}_{int(time.time())}@temp.com"
-                        
-                        new_user = models.User(
-                            username=student_number,
-                            email=user_email,
-                            full_name=full_name,
-                            password_hash=get_password_hash(password_from_csv),
-                            role="student"
-                        )
-                        db.add(new_user)
-                        db.flush()  # Get the user ID
-                        linked_user_id = new_user.id
+                    
+                        user_rows.append({
+                            "username": student_number,
+                            "email": user_email,
+                            "full_name": full_name,
+                            "password_hash": None,  # filled in per batch by _fill_password_hashes
+                            "role": "student",
+                        })
+                        user_passwords.append(password_from_csv)
+                        pending_emails.add(user_email)
                     except Exception as e:
-                        db.rollback()  # Rollback on error
                         errors.append(f"Row {idx}: Failed to create user account: {str(e)}")
                         continue
-                
-                # Create new student
-                new_student = models.Student(
-                    student_number=student_number,
-                    full_name=full_name,
-                    email=email,
-                    phone=phone,
-                    year_level=year_level,
-                    status=status,
-                    graduation_year=graduation_year,
-                    notes=notes,
-                    created_at=datetime.utcnow(),
-                    user_id=linked_user_id
-                )
-                
-                db.add(new_student)
-                db.flush()  # Get the student_id
-                
+            
+                # Create new student (user_id for a newly created user is filled in at insert time)
+                student_rows.append({
+                    "student_number": student_number,
+                    "full_name": full_name,
+                    "email": email,
+                    "phone": phone,
+                    "year_level": year_level,
+                    "status": status,
+                    "graduation_year": graduation_year,
+                    "notes": notes,
+                    "created_at": now,
+                    "user_id": linked_user_id,
+                })
+                existing_numbers.add(student_number)
+            
                 # Enroll student in provided courses (if any)
                 if course_ids:
+                    valid_cids = []
                     for cid in course_ids:
-                        course = db.query(models.Course).filter(
-                            models.Course.course_id == cid
-                        ).first()
-                        if course:
-                            enrollment = models.CourseEnrollment(
-                                course_id=cid,
-                                student_id=new_student.student_id,
-                                status="Active",
-                                enrolled_at=datetime.utcnow()
-                            )
-                            db.add(enrollment)
+                        if cid in valid_course_ids:
+                            valid_cids.append(cid)
                         else:
                             errors.append(f"Row {idx}: Course with ID {cid} not found")
-                
+                    if valid_cids:
+                        course_ids_by_number[student_number] = valid_cids
+            
                 imported += 1
-                
+            
             except Exception as e:
+                # Per-row problems are only recorded; the session is never touched mid-batch,
+                # so a bad row cannot roll back the rows accepted before it
                 errors.append(f"Row {idx}: {str(e)}")
                 continue
-        
-        # Commit all changes
-        if imported > 0:
-            db.commit()
-        
-        return BulkImportResponse(
+
+        # One INSERT set + COMMIT per batch keeps transactions bounded on large files
+        _fill_password_hashes(user_rows, user_passwords)
+        user_passwords.clear()
+        _commit_import_batch(db, user_rows, student_rows, course_ids_by_number)
+
+        yield BulkImportResponse(
             imported=imported,
             skipped=skipped,
             errors=errors[:10],  # Limit errors to first 10
             total_processed=total_processed
         )
+
+@router.post(
+    "/students/bulk-import",
+    response_model=BulkImportResponse,
+    summary="Bulk import students from file (Excel, CSV, or TXT)"
+)
+def bulk_import_students(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Bulk import students from Excel (.xlsx, .xls), CSV (.csv), or text (.txt) file.
+    
+    - full_name (required)
+    - student_number (required)
+    - email(Optional)
+    - phone(Optional)
+    - year_level (Optional)
+    - status (Optional)
+    - graduation_year (Optional)
+    - notes (Optional)
+    
+    The first row should contain column headers matching the field names above.
+
+    Declared as a plain ``def`` so FastAPI runs the parsing, hashing and DB work in its
+    threadpool instead of blocking the event loop.
+    """
+    _require_instructor(current_user)
+    
+    # Validate file type
+    file_ext = _validate_import_file(file)
+    
+    try:
+        records = _open_import_records(file.file, file_ext)
+        result = BulkImportResponse(imported=0, skipped=0, errors=[], total_processed=0)
+        for result in _run_bulk_import(db, records):
+            pass
+        return result
         
     except Exception as e:
         db.rollback()
@@ -909,3 +1160,46 @@ async def bulk_import_students(
         )
     finally:
         file.file.close()
+
+@router.post(
+    "/students/bulk-import/stream",
+    summary="Bulk import students, streaming NDJSON progress after each committed batch"
+)
+def bulk_import_students_stream(
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """Same import as ``/students/bulk-import``, but the response is ``application/x-ndjson``:
+    one BulkImportResponse-shaped line per committed batch (the last line holds the final
+    totals), or an ``{"error": ...}`` line if the import fails part-way.
+
+    Large files no longer hold a silent connection open for minutes, so proxies don't time
+    out and clients can show progress.
+    """
+    _require_instructor(current_user)
+    file_ext = _validate_import_file(file)
+
+    # The upload and yield-dependencies (get_db) are closed once this function returns, before
+    # the body is streamed: copy the upload to a private temp file and use a dedicated session
+    upload = tempfile.TemporaryFile()
+    shutil.copyfileobj(file.file, upload)
+    upload.seek(0)
+    try:
+        records = _open_import_records(upload, file_ext)
+    except Exception:
+        upload.close()
+        raise
+
+    def progress():
+        db = SessionLocal()
+        try:
+            for snapshot in _run_bulk_import(db, records):
+                yield snapshot.model_dump_json() + "\n"
+        except Exception as e:
+            db.rollback()
+            yield json.dumps({"error": f"Failed to process file: {str(e)}"}) + "\n"
+        finally:
+            db.close()
+            upload.close()
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
@@ -6,66 +6,105 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from app.db import get_db
+from sqlalchemy import and_, exists, select, update
+
+from app.db import SessionLocal
 from app import models
 
+# Candidate rows fetched from the cursor at a time while reporting
+CANDIDATE_BATCH_SIZE = 1000
+# Without --verbose, print a progress line every this many candidates instead of one per row
+PROGRESS_EVERY = 1000
+# Model index led by Submission.student_id; makes the candidate scan and the UPDATE index lookups
+STUDENT_ID_INDEX = "ix_sub_student_submitted"
+
+
+def _suspicious_student_id():
+    """
+    Heuristic for a mistaken Submission.student_id: it is an existing users.id but not any
+    Student.student_id. Both checks are subqueries, so no id sets are loaded into Python.
+    """
+    sid = models.Submission.student_id
+    return and_(sid.in_(select(models.User.id)), sid.not_in(select(models.Student.student_id)))
+
 
-def repair_submission_student_ids(dry_run: bool = False) -> None:
+def _repair_statement():
+    """
+    The whole repair as one UPDATE evaluated by the database: for submissions whose
+    student_id is a users.id but no Student.student_id, set it to the student_id of the
+    Student linked to that user (rows with no linked Student are left alone).
+    """
+    sub = models.Submission
+    linked = models.Student.user_id == sub.student_id
+    return (
+        update(sub)
+        .where(_suspicious_student_id())
+        .where(exists().where(linked))
+        .values(student_id=select(models.Student.student_id).where(linked).limit(1).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def repair_submission_student_ids(dry_run: bool = False, verbose: bool = False, ensure_index: bool = True) -> None:
     """
     Fix submissions created with wrong student_id (User.id instead of Student.student_id).
 
     Strategy:
-    - Build a map: user_id -> student_id from Student.user_id.
-    - Find submissions where s.student_id matches an existing users.id but NOT any Student.student_id.
+    - Find submissions where s.student_id matches an existing users.id but NOT any Student.student_id,
+      together with the Student.student_id linked to that user (via Student.user_id).
     - For each such submission, if user_id maps to a Student.student_id, update s.student_id accordingly.
-    - Print a summary and optionally run in dry_run mode.
+      The report is built in Python; the write itself is a single server-side UPDATE.
+    - Print a summary (per-row details with verbose) and optionally run in dry_run mode.
+    - Unless ensure_index is False (or dry_run), first create the Submission.student_id index if missing.
     """
-    db = next(get_db())
+    # Plain session for a CLI script; get_db is the FastAPI dependency generator
+    db = SessionLocal()
     try:
-        # Map user_id -> student_id
-        pairs = db.query(models.Student.user_id, models.Student.student_id).all()
-        user_to_student = {uid: sid for (uid, sid) in pairs if uid is not None}
-        print(f"Loaded {len(user_to_student)} user->student mappings")
-
-        # Collect valid student_ids
-        valid_student_ids = set(sid for (_, sid) in pairs)
-
-        # Find candidate submissions where student_id is actually a user_id
-        # A simple heuristic: student_id in users table but not in Student.student_id set
-        user_ids = [u.id for u in db.query(models.User.id).all()]
-        bad_ids = set(user_ids) - valid_student_ids
-        if not bad_ids:
-            print("No mismatched IDs detected by heuristic.")
-        
-        cands = (
-            db.query(models.Submission.submission_id, models.Submission.student_id)
-            .filter(models.Submission.student_id.in_(bad_ids))
-            .all()
-        )
-        print(f"Found {len(cands)} submissions with suspicious student_id values")
-
-        fixed = 0
-        skipped = 0
-        for sub_id, sid in cands:
-            # Interpret sid as user_id and map
-            new_sid = user_to_student.get(sid)
-            if new_sid:
-                print(f"Fixing Submission {sub_id}: {sid} -> {new_sid}")
-                if not dry_run:
-                    db.query(models.Submission).filter(models.Submission.submission_id == sub_id).update(
-                        {models.Submission.student_id: new_sid}, synchronize_session=False
-                    )
-                fixed += 1
-            else:
-                print(f"Skipping Submission {sub_id}: {sid} (no Student mapped from this user_id)")
-                skipped += 1
-
-        if not dry_run:
-            db.commit()
+        # One explicit transaction for the scan and the write: commits when the block
+        # completes, rolls back if anything raises
+        with db.begin():
+            # Cheap EXISTS probe first: a healthy database returns here after one LIMIT 1 lookup,
+            # before any index DDL or candidate scan
+            if not db.query(exists().where(_suspicious_student_id())).scalar():
+                print("No mismatched IDs detected by heuristic.")
+                return
+
+            if ensure_index and not dry_run:
+                index = next(ix for ix in models.Submission.__table__.indexes if ix.name == STUDENT_ID_INDEX)
+                index.create(db.connection(), checkfirst=True)
+
+            # Find candidate submissions where student_id is actually a user_id.
+            # The outer join on Student.user_id returns the corrected student_id with each row.
+            cands = (
+                db.query(models.Submission.submission_id, models.Submission.student_id, models.Student.student_id)
+                .outerjoin(models.Student, models.Student.user_id == models.Submission.student_id)
+                .filter(_suspicious_student_id())
+                .yield_per(CANDIDATE_BATCH_SIZE)  # stream instead of materializing every row
+            )
+
+            fixed = 0
+            skipped = 0
+            for sub_id, sid, new_sid in cands:
+                if new_sid:
+                    if verbose:
+                        print(f"Fixing Submission {sub_id}: {sid} -> {new_sid}")
+                    fixed += 1
+                else:
+                    if verbose:
+                        print(f"Skipping Submission {sub_id}: {sid} (no Student mapped from this user_id)")
+                    skipped += 1
+                if not verbose and (fixed + skipped) % PROGRESS_EVERY == 0:
+                    print(f"... {fixed + skipped} candidates checked ({fixed} fixable)")
+
+            print(f"Found {fixed + skipped} submissions with suspicious student_id values")
+
+            # Nothing fixable found: skip the UPDATE (and its subqueries) entirely
+            if fixed and not dry_run:
+                updated = db.execute(_repair_statement()).rowcount
+                print(f"Updated {updated} submissions")
         print(f"Done. Fixed={fixed}, Skipped={skipped}, DryRun={dry_run}")
 
     except Exception as e:
-        db.rollback()
         print("Repair failed:", e)
         raise
     finally:
@@ -76,5 +115,7 @@ if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser(description="Repair Submission.student_id values mistaken for User.id")
     p.add_argument("--dry-run", action="store_true", help="Do not write changes, just report")
+    p.add_argument("-v", "--verbose", action="store_true", help="Print every fixed/skipped submission")
+    p.add_argument("--skip-index", action="store_true", help=f"Do not create {STUDENT_ID_INDEX} if missing")
     args = p.parse_args()
-    repair_submission_student_ids(dry_run=args.dry_run)
+    repair_submission_student_ids(dry_run=args.dry_run, verbose=args.verbose, ensure_index=not args.skip_index)
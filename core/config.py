@@ -13,6 +13,15 @@ class Settings(BaseSettings):
 
     # DB
     DATABASE_URL: str = "sqlite:///./dentist.db"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600
+    DB_INSERTMANYVALUES_PAGE_SIZE: int = 1000
+    # Rows per INSERT/COMMIT batch in /student-management/students/bulk-import
+    BULK_IMPORT_BATCH_SIZE: int = 10000
+    # PostgreSQL only: also match submission searches by trigram similarity (pg_trgm `%`).
+    # Enable after running migrations.add_submission_list_indexes (creates the extension + index).
+    PG_TRGM_SEARCH: bool = False
 
     # CORS
     ALLOWED_CORS_ORIGINS: List[AnyHttpUrl] | List[str] = ["*"]
@@ -21,6 +30,9 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE_MB: int = 20
     ALLOWED_FILE_TYPES: List[str] = [".pdf", ".png", ".jpg", ".jpeg", ".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx", ".zip"]
+    # When served behind nginx, an `internal` location aliasing UPLOAD_DIR (e.g. "/internal-uploads/").
+    # If set, file downloads are handed to nginx via X-Accel-Redirect instead of streamed by Python.
+    UPLOAD_ACCEL_REDIRECT_PREFIX: str = ""
 
     @field_validator("ALLOWED_CORS_ORIGINS", mode="before")
     @classmethod
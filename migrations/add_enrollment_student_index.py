@@ -0,0 +1,32 @@
+"""
+Add the composite CourseEnrollment(student_id, course_id, status) index declared on the model.
+Run:
+  python -m migrations.add_enrollment_student_index
+
+Base.metadata.create_all() only creates indexes together with new tables, so existing
+databases need this once. Works on SQLite and PostgreSQL.
+"""
+from __future__ import annotations
+from sqlalchemy import text
+
+from app.db import engine
+
+INDEX_NAME = "ix_enrollment_student_course_status"
+
+
+def upgrade(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+            'ON "CourseEnrollment" (student_id, course_id, status)'
+        ))
+    print(f"✓ Ensured index {INDEX_NAME} on CourseEnrollment")
+
+
+def downgrade(engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+
+
+if __name__ == "__main__":
+    upgrade(engine)
@@ -0,0 +1,51 @@
+"""
+Add the indexes backing the submissions review list (/submissions).
+Run:
+  python -m migrations.add_submission_list_indexes
+
+Creates the composite Submission (status|student_id|assignment_id, submitted_at)
+indexes declared on the model; Base.metadata.create_all() only creates indexes
+together with new tables, so existing databases need this once.
+
+On PostgreSQL it also enables pg_trgm and adds a GIN trigram index on
+Assignment.title for the title search. SQLite cannot index infix LIKE patterns,
+so that one is skipped there.
+"""
+from __future__ import annotations
+from sqlalchemy import text
+
+from app.db import engine
+
+STATEMENTS = [
+    'CREATE INDEX IF NOT EXISTS ix_sub_status_submitted ON "Submission" (status, submitted_at)',
+    'CREATE INDEX IF NOT EXISTS ix_sub_student_submitted ON "Submission" (student_id, submitted_at)',
+    'CREATE INDEX IF NOT EXISTS ix_sub_assignment_submitted ON "Submission" (assignment_id, submitted_at)',
+]
+
+PG_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS ix_assignment_title_trgm ON "Assignment" USING gin (title gin_trgm_ops)',
+]
+
+
+def upgrade(engine) -> None:
+    with engine.begin() as conn:
+        for stmt in STATEMENTS:
+            conn.execute(text(stmt))
+        if engine.dialect.name == "postgresql":
+            for stmt in PG_STATEMENTS:
+                conn.execute(text(stmt))
+    print("✓ Ensured submission list indexes")
+
+
+def downgrade(engine) -> None:
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("DROP INDEX IF EXISTS ix_assignment_title_trgm"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_sub_assignment_submitted"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_sub_student_submitted"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_sub_status_submitted"))
+
+
+if __name__ == "__main__":
+    upgrade(engine)
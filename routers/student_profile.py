@@ -13,10 +13,13 @@ from app.db import get_db
 from app import models
 from app.deps import get_current_active_user
 from routers.auth import PasswordChange, change_password
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case, select
 from datetime import timedelta
+import logging
+import time
 
 router = APIRouter(prefix="/student-profile", tags=["student-profile"])
+logger = logging.getLogger(__name__)
 
 # ---- Pydantic models --------------------------------------------------------
 
@@ -59,6 +62,9 @@ class StudentProfileResponse(BaseModel):
     emergency_contact_relationship: Optional[str]
     emergency_contact_phone: Optional[str]
 
+    class Config:
+        from_attributes = True
+
 class StudentCourseEnrollment(BaseModel):
     course_id: int
     course_title: str
@@ -108,6 +114,31 @@ def _require_student_or_instructor(user: models.User):
     if (user.role or "").lower() not in {"student", "instructor", "admin"}:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Student, instructor, or admin role required")
 
+RANK_PERIOD_DAYS = {"week": 7, "month": 30, "quarter": 90, "year": 365}
+TOP_PERFORMERS_TTL_SECONDS = 60
+# window_days -> (time bucket, top-5 student ids); one entry per period, replaced when its bucket expires
+_top_performers_cache: dict = {}
+
+def _top_performer_ids(db: Session, window_days: int) -> tuple:
+    """Ids of the top 5 students by average feedback grade over the last ``window_days`` days."""
+    now = datetime.utcnow()
+    start = now - timedelta(days=window_days)
+    rows = db.query(
+        models.Student.student_id,
+        func.avg(models.SubmissionFeedback.grade).label("avg_grade")
+    ).join(
+        models.Submission, models.Student.student_id == models.Submission.student_id
+    ).join(
+        models.SubmissionFeedback, models.Submission.submission_id == models.SubmissionFeedback.submission_id
+    ).filter(
+        and_(
+            models.Submission.submitted_at >= start,
+            models.Submission.submitted_at <= now,
+            models.SubmissionFeedback.grade.isnot(None)
+        )
+    ).group_by(models.Student.student_id).order_by(func.avg(models.SubmissionFeedback.grade).desc()).limit(5).all()
+    return tuple(sid for sid, _ in rows)
+
 # ---- Routes ----------------------------------------------------------------
 
 @router.get(
@@ -144,28 +175,9 @@ def get_student_profile(
             if not student:
                 raise HTTPException(status_code=404, detail="Student not found")
     
-    print(f"[DEBUG Backend] Fetched student data: student_id={student.student_id}, name={student.full_name}, email={student.email}")
-
-    return StudentProfileResponse(
-        student_id=student.student_id,
-        student_number=student.student_number,
-        full_name=student.full_name,
-        email=student.email,
-        phone=student.phone,
-        year_level=student.year_level,
-        status=student.status,
-        graduation_year=student.graduation_year,
-        notes=student.notes,
-        created_at=student.created_at,
-        user_id=student.user_id,
-        gpa=getattr(student, 'gpa', None),
-        date_of_birth=getattr(student, 'date_of_birth', None),
-        nationality=getattr(student, 'nationality', None),
-        address=getattr(student, 'address', None),
-        emergency_contact_name=getattr(student, 'emergency_contact_name', None),
-        emergency_contact_relationship=getattr(student, 'emergency_contact_relationship', None),
-        emergency_contact_phone=getattr(student, 'emergency_contact_phone', None),
-    )
+    logger.debug("Fetched student profile: student_id=%s", student.student_id)
+
+    return StudentProfileResponse.model_validate(student)
 
 
 @router.get(
@@ -191,35 +203,17 @@ def get_student_rank(
         if not stu or stu.student_id != student_id:
             raise HTTPException(status_code=403, detail="Access denied")
 
-    # Determine date range
-    now = datetime.utcnow()
-    if period == "week":
-        start = now - timedelta(days=7)
-    elif period == "quarter":
-        start = now - timedelta(days=90)
-    elif period == "year":
-        start = now - timedelta(days=365)
-    else:  # month
-        start = now - timedelta(days=30)
-
-    # Query top 5 by average grade
-    rows = db.query(
-        models.Student.student_id,
-        func.avg(models.SubmissionFeedback.grade).label("avg_grade")
-    ).join(
-        models.Submission, models.Student.student_id == models.Submission.student_id
-    ).join(
-        models.SubmissionFeedback, models.Submission.submission_id == models.SubmissionFeedback.submission_id
-    ).filter(
-        and_(
-            models.Submission.submitted_at >= start,
-            models.Submission.submitted_at <= now,
-            models.SubmissionFeedback.grade.isnot(None)
-        )
-    ).group_by(models.Student.student_id).order_by(func.avg(models.SubmissionFeedback.grade).desc()).limit(5).all()
+    # The leaderboard changes slowly: share one computation per period per TOP_PERFORMERS_TTL_SECONDS
+    window_days = RANK_PERIOD_DAYS.get(period, 30)  # unknown periods fall back to month
+    bucket = int(time.time() // TOP_PERFORMERS_TTL_SECONDS)
+    cached = _top_performers_cache.get(window_days)
+    if cached is not None and cached[0] == bucket:
+        top_ids = cached[1]
+    else:
+        top_ids = _top_performer_ids(db, window_days)
+        _top_performers_cache[window_days] = (bucket, top_ids)
 
-    rank_map = {sid: idx + 1 for idx, (sid, _) in enumerate(rows)}
-    rank_val = rank_map.get(int(student_id))
+    rank_val = top_ids.index(student_id) + 1 if student_id in top_ids else None
     return StudentRankResponse(student_id=student_id, period=period, rank=rank_val)
 
 
@@ -298,26 +292,7 @@ def update_student_profile(
                 # This ensures the /auth/me endpoint returns the updated name
                 pass  # We don't update username, just keep the full_name in Student table
         
-        return StudentProfileResponse(
-            student_id=student.student_id,
-            student_number=student.student_number,
-            full_name=student.full_name,
-            email=student.email,
-            phone=student.phone,
-            year_level=student.year_level,
-            status=student.status,
-            graduation_year=student.graduation_year,
-            notes=student.notes,
-            created_at=student.created_at,
-            user_id=student.user_id,
-            gpa=getattr(student, 'gpa', None),
-            date_of_birth=getattr(student, 'date_of_birth', None),
-            nationality=getattr(student, 'nationality', None),
-            address=getattr(student, 'address', None),
-            emergency_contact_name=getattr(student, 'emergency_contact_name', None),
-            emergency_contact_relationship=getattr(student, 'emergency_contact_relationship', None),
-            emergency_contact_phone=getattr(student, 'emergency_contact_phone', None),
-        )
+        return StudentProfileResponse.model_validate(student)
     except IntegrityError:
         db.rollback()
         raise HTTPException(status_code=400, detail="Failed to update profile")
@@ -353,15 +328,15 @@ def get_student_academic_info(
 
     # Build current courses from real enrollments
     current_courses: List[StudentCourseEnrollment] = []
-    enrollments = db.query(models.CourseEnrollment).filter(
+    # Enrollments joined to their courses in one query (enrollments without a course drop out)
+    enrollments = db.query(models.CourseEnrollment, models.Course).join(
+        models.Course, models.Course.course_id == models.CourseEnrollment.course_id
+    ).filter(
         models.CourseEnrollment.student_id == student.student_id,
         models.CourseEnrollment.status == "Active"
-    ).all()
+    ).order_by(models.CourseEnrollment.enrollment_id).all()
 
-    for enr in enrollments:
-        course = db.query(models.Course).filter(models.Course.course_id == enr.course_id).first()
-        if not course:
-            continue
+    for enr, course in enrollments:
         current_courses.append(
             StudentCourseEnrollment(
                 course_id=course.course_id,
@@ -412,26 +387,7 @@ def update_student_gpa(
         db.commit()
         db.refresh(student)
         
-        return StudentProfileResponse(
-            student_id=student.student_id,
-            student_number=student.student_number,
-            full_name=student.full_name,
-            email=student.email,
-            phone=student.phone,
-            year_level=student.year_level,
-            status=student.status,
-            graduation_year=student.graduation_year,
-            notes=student.notes,
-            created_at=student.created_at,
-            user_id=student.user_id,
-            gpa=getattr(student, 'gpa', None),
-            date_of_birth=getattr(student, 'date_of_birth', None),
-            nationality=getattr(student, 'nationality', None),
-            address=getattr(student, 'address', None),
-            emergency_contact_name=getattr(student, 'emergency_contact_name', None),
-            emergency_contact_relationship=getattr(student, 'emergency_contact_relationship', None),
-            emergency_contact_phone=getattr(student, 'emergency_contact_phone', None),
-        )
+        return StudentProfileResponse.model_validate(student)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update GPA")
@@ -473,43 +429,83 @@ def get_student_attendance(
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
     
-    # Build from real Lecture and LectureAttendance data
-    enrollments = db.query(models.CourseEnrollment).filter(
+    # Build from real Lecture and LectureAttendance data: every lecture of every active
+    # enrollment with the student's attendance mark (if any), in one joined query
+    rows = db.query(
+        models.CourseEnrollment.enrollment_id,
+        models.Lecture.lecture_id,
+        models.Lecture.date,
+        models.Course.title,
+        models.Course.code,
+        models.LectureAttendance.status,
+        models.LectureAttendance.notes,
+    ).join(
+        models.Course, models.Course.course_id == models.CourseEnrollment.course_id
+    ).join(
+        models.Lecture, models.Lecture.course_id == models.Course.course_id
+    ).outerjoin(
+        models.LectureAttendance,
+        and_(
+            models.LectureAttendance.lecture_id == models.Lecture.lecture_id,
+            models.LectureAttendance.student_id == student_id,
+        )
+    ).filter(
         models.CourseEnrollment.student_id == student_id,
         models.CourseEnrollment.status == "Active"
+    ).order_by(
+        models.CourseEnrollment.enrollment_id, models.Lecture.lecture_id, models.LectureAttendance.id
     ).all()
 
     attendance_records: List[AttendanceRecord] = []
-    total_classes = 0
-    present_classes = 0
-    absent_classes = 0
-    late_classes = 0
-
-    for enr in enrollments:
-        course = db.query(models.Course).filter(models.Course.course_id == enr.course_id).first()
-        if not course:
+    seen = set()
+
+    for enrollment_id, lecture_id, lecture_date, course_title, course_code, rec_status, rec_notes in rows:
+        # Only the first attendance mark counts if a lecture was marked more than once
+        if (enrollment_id, lecture_id) in seen:
             continue
-        lectures = db.query(models.Lecture).filter(models.Lecture.course_id == enr.course_id).all()
-        for lec in lectures:
-            total_classes += 1
-            rec = db.query(models.LectureAttendance).filter(
-                models.LectureAttendance.lecture_id == lec.lecture_id,
-                models.LectureAttendance.student_id == student_id,
-            ).first()
-            status_val = rec.status if rec else "Absent"
-            if status_val == "Present" or status_val == "Excused":
-                present_classes += 1 if status_val == "Present" else 0
-            if status_val == "Absent":
-                absent_classes += 1
-            if status_val == "Late":
-                late_classes += 1
-            attendance_records.append(AttendanceRecord(
-                date=lec.date.date(),
-                course_name=course.title,
-                course_code=course.code,
-                status=status_val,
-                notes=getattr(rec, 'notes', None) if rec else None
-            ))
+        seen.add((enrollment_id, lecture_id))
+        status_val = rec_status or "Absent"
+        attendance_records.append(AttendanceRecord(
+            date=lecture_date.date(),
+            course_name=course_title,
+            course_code=course_code,
+            status=status_val,
+            notes=rec_notes
+        ))
+
+    # Counters are aggregated by the database: the first mark per lecture (Absent if unmarked)
+    # of every active enrollment, summed with CASE in a single pass
+    first_mark = (
+        select(models.LectureAttendance.status)
+        .where(
+            models.LectureAttendance.lecture_id == models.Lecture.lecture_id,
+            models.LectureAttendance.student_id == student_id,
+        )
+        .order_by(models.LectureAttendance.id)
+        .limit(1)
+        .correlate(models.Lecture)
+        .scalar_subquery()
+    )
+    marks = db.query(
+        func.coalesce(first_mark, "Absent").label("status")
+    ).select_from(models.CourseEnrollment).join(
+        models.Course, models.Course.course_id == models.CourseEnrollment.course_id
+    ).join(
+        models.Lecture, models.Lecture.course_id == models.Course.course_id
+    ).filter(
+        models.CourseEnrollment.student_id == student_id,
+        models.CourseEnrollment.status == "Active"
+    ).subquery()
+    total_classes, present_classes, absent_classes, late_classes = db.query(
+        func.count(),
+        func.sum(case((marks.c.status == "Present", 1), else_=0)),
+        func.sum(case((marks.c.status == "Absent", 1), else_=0)),
+        func.sum(case((marks.c.status == "Late", 1), else_=0)),
+    ).select_from(marks).one()
+    # SUM over no rows is NULL
+    present_classes = present_classes or 0
+    absent_classes = absent_classes or 0
+    late_classes = late_classes or 0
 
     attendance_rate = (present_classes / total_classes * 100) if total_classes > 0 else 0.0
 